@@ -0,0 +1,200 @@
+# Benchmarks for the process pipeline, run against synthetic slates shaped like sportsipy objects and a mongomock
+# database so they need neither network nor a mongod (set SPORTBLURBS_TEST_MONGO_URI to write to a real one instead):
+#
+#     pip install -r benchmarks/requirements.txt
+#     python -m pytest benchmarks --benchmark-storage=benchmarks/baselines --benchmark-compare=0001 \
+#         --benchmark-compare-fail=mean:20%
+#
+# That run fails when any benchmark's mean regresses by more than 20% against the baseline committed under
+# benchmarks/baselines (kept per machine type, so save a new one with --benchmark-save=baseline on other hardware).
+# The slates are synthetic rather than recorded sportsipy pages, so the baseline covers our own code and not parsing.
+from datetime import datetime
+import os
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+pytest.importorskip("pytest_benchmark")
+
+from sportblurbs.league import League, NflLeague  # noqa: E402
+
+SLATE_SIZES = [1, 15, 100, 1000]
+PLAYERS_PER_TEAM = 13
+POSITIONS = ["QB", "RB", "WR", "TE", "K"]
+SLATE_DATE = datetime(2021, 10, 10)
+
+
+# Each league's player boxscores and boxscores carry the attributes (under the names) of that league's sportsipy
+# BoxscorePlayer and Boxscore, so the benchmarks run the same paths real objects would.
+def _nfl_stats(game_num, player_num):
+    return dict(
+        completed_passes=20,
+        attempted_passes=30 if player_num == 0 else 0,
+        passing_yards=250,
+        passing_touchdowns=2,
+        interceptions=1,
+        fumbles_lost=0,
+        rush_attempts=player_num % 4,
+        rush_yards=12 * (player_num % 4),
+        rush_touchdowns=player_num % 2,
+        receptions=player_num % 6,
+        times_pass_target=player_num % 6 + 2,
+        receiving_yards=11 * (player_num % 6),
+        receiving_touchdowns=player_num % 3,
+        field_goals_attempted=2 if player_num == PLAYERS_PER_TEAM - 1 else 0,
+        field_goals_made=1,
+        extra_points_attempted=3,
+        extra_points_made=3,
+    )
+
+
+def _nba_stats(game_num, player_num):
+    return dict(
+        minutes_played=game_num % 48 + player_num,
+        points=2 * player_num,
+        total_rebounds=player_num % 7,
+        assists=player_num % 5,
+        steals=player_num % 2,
+        blocks=player_num % 3,
+    )
+
+
+def _mlb_stats(game_num, player_num):
+    pitching = player_num == 0
+    return dict(
+        at_bats=0 if pitching else player_num % 5,
+        hits=0 if pitching else player_num % 3,
+        runs=player_num % 2,
+        runs_batted_in=player_num % 3,
+        bases_on_balls=player_num % 2,
+        times_struck_out=player_num % 3,
+        innings_pitched=6.1 if pitching else None,
+        earned_runs_allowed=2 if pitching else None,
+        hits_allowed=5 if pitching else None,
+        strikeouts=7 if pitching else None,
+        bases_on_balls_given=1 if pitching else None,
+    )
+
+
+LEAGUE_STATS = {"nfl": _nfl_stats, "nba": _nba_stats, "mlb": _mlb_stats}
+
+
+def _player_boxscore(league, game_num, team, player_num):
+    return SimpleNamespace(
+        player_id=f"{team}{player_num:02d}",
+        name=f"Player {team} {player_num}",
+        **LEAGUE_STATS[league](game_num, player_num),
+    )
+
+
+def _name(team):
+    return SimpleNamespace(text=lambda: f"Team {team}")
+
+
+def _boxscore(league, game_num):
+    home, away = f"H{game_num:04d}", f"A{game_num:04d}"
+    home_score, away_score = 24 + game_num % 7, 17 + game_num % 11
+    winning, losing = (home, away) if home_score > away_score else (away, home)
+    score = "runs" if league == "mlb" else "points"
+    boxscore = SimpleNamespace(
+        _uri=f"{SLATE_DATE:%Y%m%d}0{home}",
+        _home_name=_name(home),
+        _away_name=_name(away),
+        date=SLATE_DATE.strftime("%A, %B %d, %Y"),
+        winning_name=f"Team {winning}",
+        winning_abbr=winning,
+        losing_name=f"Team {losing}",
+        losing_abbr=losing,
+        home_players=[_player_boxscore(league, game_num, home, p) for p in range(PLAYERS_PER_TEAM)],
+        away_players=[_player_boxscore(league, game_num, away, p) for p in range(PLAYERS_PER_TEAM)],
+        **{f"home_{score}": home_score, f"away_{score}": away_score},
+    )
+    # Of the three leagues, only NFL boxscores have the teams' abbreviations.
+    if league == "nfl":
+        boxscore.home_abbreviation, boxscore.away_abbreviation = home, away
+    return boxscore
+
+
+def _player(player_id):
+    return SimpleNamespace(
+        player_id=player_id,
+        name=f"Player {player_id}",
+        position=POSITIONS[int(player_id[-2:]) % len(POSITIONS)],
+        team_abbreviation=player_id[:5],
+    )
+
+
+def make_slate(num_games, league="nfl"):
+    return [_boxscore(league, game_num) for game_num in range(num_games)]
+
+
+def make_league_module(boxscores):
+    boxscores_by_uri = {boxscore._uri: boxscore for boxscore in boxscores}
+    games = [{"boxscore": uri} for uri in boxscores_by_uri]
+    return SimpleNamespace(
+        boxscore=SimpleNamespace(
+            Boxscores=lambda *args, **kwargs: SimpleNamespace(games=_AnyKey(games)),
+            Boxscore=boxscores_by_uri.__getitem__,
+        ),
+        roster=SimpleNamespace(Player=lambda player_id: lambda season: _player(player_id)),
+    )
+
+
+class _AnyKey(dict):
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+    def __getitem__(self, key):
+        return self.value
+
+
+def make_league(boxscores):
+    return League("BEN", make_league_module(boxscores), season_start=(8, 1))
+
+
+def make_nfl_league(boxscores=()):
+    return NflLeague("NFL", make_league_module(boxscores), season_start=(8, 1))
+
+
+@pytest.fixture(params=SLATE_SIZES, ids=[f"{size}-games" for size in SLATE_SIZES])
+def slate(request):
+    return make_slate(request.param)
+
+
+@pytest.fixture
+def database():
+    if "SPORTBLURBS_TEST_MONGO_URI" not in os.environ:
+        yield mongomock.MongoClient()["sportblurbs-benchmark"]
+        return
+    from sportblurbs.database import get_database
+
+    database = get_database("sportblurbs-benchmark", os.environ["SPORTBLURBS_TEST_MONGO_URI"])
+    yield database
+    database.client.drop_database(database.name)
+
+
+def is_mongomock(database):
+    return isinstance(database, mongomock.Database)
+
+
+def record_throughput(benchmark, games=0, blurbs=0):
+    if not benchmark.stats:
+        return
+    mean = benchmark.stats.stats.mean
+    if games:
+        benchmark.extra_info["games_per_sec"] = games / mean
+    if blurbs:
+        benchmark.extra_info["blurbs_per_sec"] = blurbs / mean
+
+
+def record_peak_memory(benchmark, func, *args, **kwargs):
+    tracemalloc.start()
+    try:
+        result = func(*args, **kwargs)
+        benchmark.extra_info["peak_memory_kib"] = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+    return result
@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(*args):
+    subprocess.run([sys.executable, *args], cwd=ROOT, env={**os.environ, "PYTHONPATH": ROOT}, check=True)
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["sportblurbs.utils", "sportblurbs.league", "sportblurbs.writer", "sportblurbs.process", "sportblurbs.spin"],
+)
+def test_import_time(benchmark, module):
+    benchmark.pedantic(_run, args=("-c", f"import {module}"), rounds=5)
+
+
+def test_bin_process_help(benchmark):
+    benchmark.pedantic(_run, args=("bin/process", "--help"), kwargs=dict(), rounds=5)
@@ -0,0 +1,149 @@
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+import sportsipy.mlb.boxscore
+import sportsipy.nba.boxscore
+import sportsipy.nfl.boxscore
+
+from benchmarks.conftest import (
+    is_mongomock,
+    make_league,
+    make_nfl_league,
+    make_slate,
+    record_peak_memory,
+    record_throughput,
+    SLATE_DATE,
+)
+from sportblurbs.database import create_game_documents
+from sportblurbs.filter import (
+    filter_nfl_at_least_one_att,
+    frame_filter_mlb_at_least_one_ab_or_ip,
+    frame_filter_nba_at_least_one_minute_played,
+    frame_filter_nfl_at_least_one_att,
+    player_stat_frame,
+)
+from sportblurbs.process import process_games
+from sportblurbs.template import NEWS_TEMPLATES
+from sportblurbs.writer import write_nfl_player_news, write_player_blurbs_from_boxscores
+
+
+def _num_players(slate):
+    return sum(len(boxscore.home_players + boxscore.away_players) for boxscore in slate)
+
+
+LEAGUES = {
+    "nfl": (sportsipy.nfl.boxscore, frame_filter_nfl_at_least_one_att),
+    "nba": (sportsipy.nba.boxscore, frame_filter_nba_at_least_one_minute_played),
+    "mlb": (sportsipy.mlb.boxscore, frame_filter_mlb_at_least_one_ab_or_ip),
+}
+
+
+def _count_blurb_documents(database, blurb_documents, session=None):
+    return len(blurb_documents)
+
+
+def test_process_games(benchmark, slate, database):
+    # mongomock scans the collection for every blurb upsert instead of using the unique key index, which makes the
+    # largest slate take hours without saying anything about MongoDB. Without a real mongod, the blurb writes of that
+    # slate are left out and only the rest of the pipeline is measured.
+    stub_blurb_writes = is_mongomock(database) and len(slate) > 100
+    league = make_league(slate)
+
+    def setup():
+        database.drop_collection("game")
+        database.drop_collection("blurb")
+        league._boxscores.clear()
+
+    blurb_writes = mock.patch("sportblurbs.process.put_blurb_documents", _count_blurb_documents)
+    with blurb_writes if stub_blurb_writes else nullcontext():
+        benchmark.pedantic(
+            process_games, args=([SLATE_DATE], league), kwargs={"database": database}, setup=setup, rounds=3
+        )
+        setup()
+        record_peak_memory(benchmark, process_games, [SLATE_DATE], league, database=database)
+    benchmark.extra_info["blurb_writes"] = (
+        "stubbed" if stub_blurb_writes else "mongomock" if is_mongomock(database) else "mongod"
+    )
+    record_throughput(benchmark, games=len(slate), blurbs=_num_players(slate))
+
+
+def test_write_player_blurbs_from_boxscores(benchmark, slate):
+    league = make_league(slate)
+    blurbs = benchmark(write_player_blurbs_from_boxscores, slate, league, write_nfl_player_news)
+    record_peak_memory(benchmark, write_player_blurbs_from_boxscores, slate, league, write_nfl_player_news)
+    record_throughput(benchmark, games=len(slate), blurbs=len(blurbs))
+
+
+def test_write_player_blurbs_with_row_filter(benchmark, slate):
+    league = make_league(slate)
+    blurbs = benchmark(
+        write_player_blurbs_from_boxscores, slate, league, write_nfl_player_news, filters=filter_nfl_at_least_one_att
+    )
+    record_throughput(benchmark, games=len(slate), blurbs=len(blurbs))
+
+
+def test_write_player_blurbs_with_frame_filter(benchmark, slate):
+    league = make_league(slate)
+    blurbs = benchmark(
+        write_player_blurbs_from_boxscores,
+        slate,
+        league,
+        write_nfl_player_news,
+        filters=frame_filter_nfl_at_least_one_att,
+    )
+    record_throughput(benchmark, games=len(slate), blurbs=len(blurbs))
+
+
+@pytest.mark.parametrize("league_name", LEAGUES)
+def test_slates_use_the_sportsipy_attribute_names_of_their_league(league_name):
+    boxscore_module, _ = LEAGUES[league_name]
+    (boxscore,) = make_slate(1, league_name)
+    for name in vars(boxscore):
+        assert name.startswith("_") or hasattr(boxscore_module.Boxscore, name), name
+    for name in vars(boxscore.home_players[0]):
+        assert hasattr(boxscore_module.BoxscorePlayer, name), name
+
+
+@pytest.mark.parametrize("league_name", LEAGUES)
+def test_write_player_blurbs_per_league(benchmark, league_name):
+    _, frame_filter = LEAGUES[league_name]
+    slate = make_slate(15, league_name)
+    league = make_league(slate)
+    blurbs = benchmark(
+        write_player_blurbs_from_boxscores,
+        slate,
+        league,
+        NEWS_TEMPLATES[league_name.upper()],
+        filters=frame_filter,
+    )
+    assert blurbs
+    record_throughput(benchmark, games=len(slate), blurbs=len(blurbs))
+
+
+def test_player_stat_frame(benchmark, slate):
+    player_boxscores = [
+        player_boxscore for boxscore in slate for player_boxscore in boxscore.home_players + boxscore.away_players
+    ]
+    benchmark(player_stat_frame, player_boxscores, frame_filter_nfl_at_least_one_att.columns)
+    record_throughput(benchmark, games=len(slate))
+
+
+def test_create_game_documents(benchmark, slate):
+    league = make_league(slate)
+    benchmark(create_game_documents, slate, league)
+    record_peak_memory(benchmark, create_game_documents, slate, league)
+    record_throughput(benchmark, games=len(slate))
+
+
+def test_nfl_get_weeks(benchmark):
+    league = make_nfl_league()
+    weeks = benchmark(league.get_weeks, datetime(2002, 9, 1), datetime(2021, 12, 31))
+    assert len(weeks) > 300
+
+
+def test_nfl_get_week(benchmark):
+    league = make_nfl_league()
+    dates = [datetime(2002, 8, 1) + timedelta(days=d) for d in range(0, 365 * 24, 3)]
+    benchmark(lambda: [league.get_week(date) for date in dates])
@@ -9,5 +9,6 @@ setup(
     author="Anthony Todesco",
     author_email="adtodesco@gmail.com",
     packages=["sportblurbs"],
-    scripts=["bin/process"],
+    package_data={"sportblurbs": ["data/*.json"]},
+    scripts=["bin/backfill", "bin/daemon", "bin/indexes", "bin/process", "bin/publish"],
 )
@@ -0,0 +1,90 @@
+from datetime import timedelta
+import logging
+
+from sportblurbs import metrics
+from sportblurbs.database import ensure_indexes, get_database
+from sportblurbs.fetch import fetch_all
+from sportblurbs.league import NflLeague
+from sportblurbs.process import process_boxscores
+from sportblurbs.workqueue import default_owner, WorkQueue
+from sportblurbs.writer import write_generic_player_news, write_null_spin
+
+logger = logging.getLogger()
+
+
+def backfill_units(league, start_date, end_date):
+    if isinstance(league, NflLeague):
+        return league.get_weeks(start_date, end_date)
+    return [start_date + timedelta(days=d) for d in range((end_date - start_date).days + 1)]
+
+
+def backfill_job(league, start_date, end_date):
+    return f"{league.name}:{start_date:%Y-%m-%d}:{end_date:%Y-%m-%d}"
+
+
+class Backfill:
+    def __init__(
+        self,
+        league,
+        job,
+        database=None,
+        news_func=write_generic_player_news,
+        spin_func=write_null_spin,
+        filters=None,
+        max_workers=1,
+        max_attempts=3,
+        lease=600,
+    ):
+        # A backfill job is a set of units (one date or NFL week, or one game) in a WorkQueue, each with its own status.
+        # Running a job only works through units that are not done yet, so a job that fails or is killed resumes where
+        # it stopped when it is run again, and the same job can be run from several hosts at once.
+        self.league = league
+        self.job = job
+        self.database = database if database is not None else get_database()
+        self.news_func = news_func
+        self.spin_func = spin_func
+        self.filters = filters
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.owner = default_owner()
+
+    def queue(self, worker=0):
+        # Each worker thread holds its own leases, so a lease lost by one is never completed by another.
+        return WorkQueue(self.database, self.job, self.lease, self.max_attempts, owner=f"{self.owner}:{worker}")
+
+    def plan(self, start_date, end_date, games=False):
+        # With games, every game of the range (from the schedule) is its own unit instead of every date.
+        units = backfill_units(self.league, start_date, end_date)
+        if games:
+            uris = [game["boxscore"] for game in self.league.get_games_for_dates(units)]
+            return self.queue().add([(uri, uri) for uri in uris], "game")
+        return self.queue().add([(self.league.date_string(unit), unit) for unit in units], "date")
+
+    def status(self):
+        return self.queue().status()
+
+    def unit_boxscores(self, unit_doc):
+        unit = tuple(unit_doc["unit"]) if isinstance(unit_doc["unit"], list) else unit_doc["unit"]
+        if unit_doc.get("kind") == "game":
+            return self.league.get_boxscores_for_uris([unit])
+        return list(self.league.iter_boxscores([unit]))
+
+    def process_unit(self, unit_doc):
+        # Boxscores are neither kept on the league nor held here while a unit is processed, so memory stays flat over
+        # multi-season jobs.
+        with metrics.timer("backfill.unit"):
+            process_boxscores(
+                self.unit_boxscores(unit_doc), self.league, self.database, self.news_func, self.spin_func, self.filters
+            )
+
+    def run(self):
+        ensure_indexes(self.database)
+        num_units = sum(
+            fetch_all(
+                lambda worker: self.queue(worker).work(self.process_unit), range(self.max_workers), self.max_workers
+            )
+        )
+        status = self.status()
+        logger.info(f"Backfill '{self.job}' processed {num_units} units: {status}.")
+        return status
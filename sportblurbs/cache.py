@@ -0,0 +1,123 @@
+from collections import OrderedDict
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+
+from sportblurbs import metrics
+
+logger = logging.getLogger()
+
+
+class Cache:
+    def __init__(self, path=None, table="cache", max_size=1024, ttl=24 * 60 * 60):
+        # An in-memory LRU tier of max_size entries in front of an optional SQLite tier at path. Entries older than
+        # ttl seconds are evicted from both tiers on read.
+        self.table = table
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        if path:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, stored_at REAL, value BLOB)"
+            )
+            self._connection.commit()
+
+    @staticmethod
+    def _key(key):
+        return "|".join(str(part) for part in key) if isinstance(key, tuple) else str(key)
+
+    def _expired(self, stored_at):
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def get(self, key):
+        key = self._key(key)
+        with self._lock:
+            value = self._get_from_memory(key)
+            if value is None:
+                value = self._get_from_disk(key)
+                if value is not None:
+                    self._put_in_memory(key, value[0], value[1])
+                    value = value[1]
+            if value is None:
+                self.misses += 1
+                metrics.increment(f"cache.{self.table}.misses")
+            else:
+                self.hits += 1
+                metrics.increment(f"cache.{self.table}.hits")
+            return value
+
+    def put(self, key, value):
+        key = self._key(key)
+        stored_at = time.time()
+        with self._lock:
+            self._put_in_memory(key, stored_at, value)
+            self._put_on_disk(key, stored_at, value)
+
+    def _get_from_memory(self, key):
+        if key not in self._memory:
+            return None
+        stored_at, value = self._memory[key]
+        if self._expired(stored_at):
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _put_in_memory(self, key, stored_at, value):
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _get_from_disk(self, key):
+        if not self._connection:
+            return None
+        row = self._connection.execute(f"SELECT stored_at, value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        if self._expired(row[0]):
+            self._connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._connection.commit()
+            return None
+        return row[0], pickle.loads(row[1])
+
+    def _put_on_disk(self, key, stored_at, value):
+        if not self._connection:
+            return
+        try:
+            blob = pickle.dumps(value)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            logger.debug(f"Value for cache key '{key}' could not be pickled; keeping it in memory only.", exc_info=True)
+            return
+        self._connection.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, stored_at, value) VALUES (?, ?, ?)", (key, stored_at, blob)
+        )
+        self._connection.commit()
+
+    def evict_expired(self):
+        with self._lock:
+            for key in [key for key, (stored_at, _) in self._memory.items() if self._expired(stored_at)]:
+                del self._memory[key]
+            if self._connection and self.ttl is not None:
+                self._connection.execute(f"DELETE FROM {self.table} WHERE stored_at < ?", (time.time() - self.ttl,))
+                self._connection.commit()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._memory)}
+
+    def close(self):
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+
+
+class PlayerCache(Cache):
+    def __init__(self, path=None, max_size=4096, ttl=24 * 60 * 60):
+        super().__init__(path, table="player", max_size=max_size, ttl=ttl)
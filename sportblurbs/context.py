@@ -0,0 +1,85 @@
+from dateutil import parser
+
+from .utils import game_score
+
+
+class GameContext:
+    # Game-level facts every player of a boxscore needs, worked out once per boxscore. Any other attribute is read
+    # from the wrapped boxscore, so a GameContext can be passed anywhere a boxscore is expected.
+    __slots__ = (
+        "boxscore",
+        "home_score",
+        "away_score",
+        "winning_score",
+        "losing_score",
+        "home_won",
+        "tied",
+        "home_abbr",
+        "away_abbr",
+        "_parsed_date",
+    )
+
+    def __init__(self, boxscore):
+        self.boxscore = boxscore
+        self.home_score, self.away_score = game_score(boxscore)
+        # home_won is None for games that are not complete and for ties, which have no winning side.
+        self.home_won = None
+        self.tied = False
+        if self.home_score is None or self.away_score is None:
+            self.winning_score = self.losing_score = None
+            self.home_abbr = self.away_abbr = None
+        else:
+            self.winning_score = max(self.home_score, self.away_score)
+            self.losing_score = min(self.home_score, self.away_score)
+            self.tied = self.home_score == self.away_score
+            if not self.tied:
+                self.home_won = self.home_score > self.away_score
+            # Only NFL boxscores have home_abbreviation, but every league's has winning_abbr and losing_abbr, and
+            # sportsipy makes the away team the "winner" unless the home team scored more (ties included).
+            winning_abbr, losing_abbr = boxscore.winning_abbr.upper(), boxscore.losing_abbr.upper()
+            if self.home_score > self.away_score:
+                self.home_abbr, self.away_abbr = winning_abbr, losing_abbr
+            else:
+                self.home_abbr, self.away_abbr = losing_abbr, winning_abbr
+        self._parsed_date = None
+
+    @classmethod
+    def of(cls, boxscore):
+        return boxscore if isinstance(boxscore, cls) else cls(boxscore)
+
+    def __getattr__(self, name):
+        if name in GameContext.__slots__:
+            raise AttributeError(name)
+        return getattr(self.boxscore, name)
+
+    def __repr__(self):
+        return f"GameContext({self.boxscore!r})"
+
+    def __str__(self):
+        return str(self.boxscore)
+
+    @property
+    def parsed_date(self):
+        if self._parsed_date is None:
+            self._parsed_date = parser.parse(self.boxscore.date)
+        return self._parsed_date
+
+    @property
+    def weekday(self):
+        return self.parsed_date.strftime("%A")
+
+    @property
+    def complete(self):
+        return self.home_score is not None
+
+    def is_home(self, player):
+        return player.team_abbreviation.upper() == self.home_abbr
+
+    def won(self, player):
+        return self.home_won is not None and self.is_home(player) == self.home_won
+
+    def opponent_name(self, player):
+        # sportsipy names a "winner" even for ties, so the opponent is whichever of the two names is not the player's.
+        if player.team_abbreviation.upper() == self.boxscore.winning_abbr.upper():
+            return self.boxscore.losing_name
+        return self.boxscore.winning_name
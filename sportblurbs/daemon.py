@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+import logging
+import re
+import threading
+
+from sportblurbs import metrics
+from sportblurbs.database import ensure_indexes, get_database
+from sportblurbs.league import NflLeague
+from sportblurbs.process import get_uris_to_process, process_boxscores
+from sportblurbs.utils import chunked
+from sportblurbs.writer import write_generic_player_news, write_null_spin
+
+logger = logging.getLogger()
+
+
+# Every sports-reference boxscore uri embeds the date of its game, e.g. "202110100kan" or "BOS/BOS202107280".
+GAME_DATE_PATTERN = re.compile(r"(\d{8})\d")
+
+
+def game_date(game):
+    return datetime.strptime(GAME_DATE_PATTERN.search(game["boxscore"]).group(1), "%Y%m%d")
+
+
+class PollSchedule:
+    def __init__(self, live_interval=120, idle_interval=600, backoff=2, start_hour=16, live_hours=16):
+        # Schedule-level games carry their date but not their start time, so a game is expected from start_hour (UTC,
+        # the earliest a league's games start) on its date, and is live until it completes or live_hours have passed
+        # (after which it was postponed). While a game is live, polls run every live_interval seconds right after a game
+        # completes and back off by a factor of backoff, up to idle_interval, while nothing new completes. With no game
+        # live, the daemon sleeps until the next pending game is expected or, with none pending, until start_hour the
+        # next day, when the next day's (or week's) games are polled.
+        self.live_interval = live_interval
+        self.idle_interval = idle_interval
+        self.backoff = backoff
+        self.start_hour = start_hour
+        self.live_hours = live_hours
+        self.interval = live_interval
+        self._num_complete = None
+
+    def game_start(self, game):
+        return game_date(game) + timedelta(hours=self.start_hour)
+
+    def is_live(self, game_start, now):
+        return game_start <= now < game_start + timedelta(hours=self.live_hours)
+
+    def until_start_hour(self, now):
+        start = datetime(now.year, now.month, now.day, self.start_hour)
+        if start <= now:
+            start += timedelta(days=1)
+        return (start - now).total_seconds()
+
+    def next_delay(self, games, now):
+        starts = [self.game_start(game) for game in games if game["home_score"] is None]
+        num_complete = len(games) - len(starts)
+        changed = self._num_complete is not None and num_complete > self._num_complete
+        self._num_complete = num_complete
+
+        if not any(self.is_live(start, now) for start in starts):
+            self._num_complete = None
+            self.interval = self.live_interval
+            upcoming = [start for start in starts if start > now]
+            if upcoming:
+                return (min(upcoming) - now).total_seconds()
+            return self.until_start_hour(now)
+        if changed:
+            self.interval = self.live_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.idle_interval)
+        return self.interval
+
+
+class Daemon:
+    def __init__(
+        self,
+        league,
+        database=None,
+        news_func=write_generic_player_news,
+        spin_func=write_null_spin,
+        filters=None,
+        chunk_size=None,
+        schedule=None,
+        clock=datetime.utcnow,
+    ):
+        # The league (with its player cache), the database client and the spin engine stay warm between polls.
+        self.league = league
+        self.database = database if database is not None else get_database()
+        self.news_func = news_func
+        self.spin_func = spin_func
+        self.filters = filters
+        self.chunk_size = chunk_size
+        self.schedule = schedule or PollSchedule()
+        self.clock = clock
+        self._stop = threading.Event()
+
+    def poll_dates(self, now):
+        if isinstance(self.league, NflLeague):
+            # The previous week is polled too since late games, like Monday night's, finish after the week rolls over.
+            weeks = [self.league.get_week(now - timedelta(weeks=1)), self.league.get_week(now)]
+            # Preseason weeks and the offseason have no games to poll.
+            return [(season, week) for season, week in weeks if isinstance(week, int)]
+        # Yesterday is polled too since games finish after midnight UTC.
+        return [now - timedelta(days=1), now]
+
+    def poll(self):
+        now = self.clock()
+        with metrics.timer("daemon.poll"):
+            games = self.league.get_games_for_dates(self.poll_dates(now))
+            uris = get_uris_to_process(games, self.database)
+            if uris:
+                logger.info(f"Processing {len(uris)} newly completed games...")
+            for chunk in chunked(uris, self.chunk_size or len(uris) or 1):
+                process_boxscores(
+                    self.league.get_boxscores_for_uris(chunk),
+                    self.league,
+                    self.database,
+                    self.news_func,
+                    self.spin_func,
+                    self.filters,
+                )
+        metrics.increment("daemon.polls")
+        return self.schedule.next_delay(games, now)
+
+    def run(self, max_polls=None):
+        ensure_indexes(self.database)
+        polls = 0
+        while not self._stop.is_set():
+            try:
+                delay = self.poll()
+            except Exception:
+                logger.exception("Poll failed.")
+                metrics.increment("daemon.failed_polls")
+                delay = self.schedule.idle_interval
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                break
+            logger.info(f"Next poll in {delay:.0f}s.")
+            self._stop.wait(delay)
+
+    def stop(self):
+        self._stop.set()
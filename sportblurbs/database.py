@@ -1,17 +1,95 @@
+import atexit
+from collections import namedtuple
 import datetime
-from pymongo import MongoClient
+import os
+import threading
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
 
-from sportblurbs.exception import MultipleDocumentsError
-from sportblurbs.utils import game_is_complete, game_score, get_value_from_document
+from sportblurbs import metrics
+from sportblurbs.exception import KeyNotFoundError, MultipleDocumentsError, UpsertConflictError
+from sportblurbs.record import GameRecord
+from sportblurbs.utils import get_value_from_document
 
 SPORTBLURBS_DB = "sportblurbsdb"
+CONNECTION_STRING = os.environ.get("SPORTBLURBS_MONGO_URI", "mongodb://localhost:27017/")
+# Defaults for every shared client. Any MongoClient option (maxPoolSize, timeouts, compressors, w, ...) can be overridden
+# per call to get_client/get_database or as a query option of the connection string (SPORTBLURBS_MONGO_URI).
+CLIENT_OPTIONS = {
+    "maxPoolSize": 50,
+    "connectTimeoutMS": 10000,
+    "serverSelectionTimeoutMS": 10000,
+    "socketTimeoutMS": 60000,
+}
 BLURB_COLLECTION = "blurb"
 GAME_COLLECTION = "game"
+BACKFILL_COLLECTION = "backfill"
+PUBLISHER_COLLECTION = "publisher"
+GAME_ID_KEY = "game.id"
+# Blurbs are keyed by game, player and source, so writing the blurbs of a game again never duplicates them.
+BLURB_KEY = "key"
+# Game documents are written back whole, so everything but the _id is needed when they are read for their state.
+GAME_PROJECTION = {"_id": False}
+GAME_STATE_PROJECTION = {"_id": False, GAME_ID_KEY: True, "complete": True, "processed": True}
+DUPLICATE_KEY_ERROR = 11000
+INDEXES = {
+    GAME_COLLECTION: [
+        ([(GAME_ID_KEY, ASCENDING)], {"unique": True}),
+        ([("complete", ASCENDING), ("processed", ASCENDING)], dict()),
+    ],
+    BLURB_COLLECTION: [
+        # Blurbs written before they had a key are left out of the unique index.
+        ([(BLURB_KEY, ASCENDING)], {"unique": True, "partialFilterExpression": {BLURB_KEY: {"$exists": True}}}),
+        ([("player.id", ASCENDING), ("date", DESCENDING)], dict()),
+        ([("player.league", ASCENDING), ("date", DESCENDING)], dict()),
+    ],
+    BACKFILL_COLLECTION: [
+        ([("job", ASCENDING), ("status", ASCENDING), ("order", ASCENDING)], dict()),
+    ],
+}
+# Representative queries whose plans show whether INDEXES are used.
+INDEXED_QUERIES = {
+    GAME_COLLECTION: [
+        ({GAME_ID_KEY: ""}, None),
+        ({"complete": True, "processed": False}, None),
+    ],
+    BLURB_COLLECTION: [
+        ({"player.id": ""}, [("date", DESCENDING)]),
+        ({"player.league": ""}, [("date", DESCENDING)]),
+    ],
+    BACKFILL_COLLECTION: [
+        ({"job": "", "status": "pending"}, None),
+    ],
+}
 
+BulkUpdateResult = namedtuple("BulkUpdateResult", ["matched", "upserted", "modified"])
 
-def get_database(database_name=SPORTBLURBS_DB, connection_string="mongodb://localhost:27017/"):
-    client = MongoClient(connection_string)
-    return client[database_name]
+_clients = dict()
+_clients_lock = threading.Lock()
+
+
+def get_client(connection_string=CONNECTION_STRING, **client_options):
+    # Clients are shared per connection string and options so every caller in the process uses the same pool.
+    options = dict(CLIENT_OPTIONS, **client_options)
+    key = (connection_string, tuple(sorted((option, str(value)) for option, value in options.items())))
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = MongoClient(connection_string, **options)
+        return _clients[key]
+
+
+def close_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+atexit.register(close_clients)
+
+
+def get_database(database_name=SPORTBLURBS_DB, connection_string=CONNECTION_STRING, **client_options):
+    return get_client(connection_string, **client_options)[database_name]
 
 
 def get_documents(database, collection_name, filter=None):
@@ -28,31 +106,143 @@ def get_document(database, collection_name, filter=None):
     return get_documents(database, collection_name, filter)[0]
 
 
+def get_documents_by_key(database, collection_name, key, values, projection=None, batch_size=1000):
+    values = list(dict.fromkeys(values))
+    documents = dict()
+    for i in range(0, len(values), batch_size):
+        with metrics.timer(f"db.{collection_name}.find"):
+            found = list(database[collection_name].find({key: {"$in": values[i : i + batch_size]}}, projection))
+        metrics.increment("db.round_trips")
+        for document in found:
+            value = get_value_from_document(key, document)
+            if value in documents:
+                raise MultipleDocumentsError(database.name, collection_name, f"{{{key}: {value}}}")
+            documents[value] = document
+
+    return documents
+
+
+def ensure_indexes(database):
+    index_names = dict()
+    for collection_name, indexes in INDEXES.items():
+        models = [IndexModel(keys, **options) for keys, options in indexes]
+        index_names[collection_name] = database[collection_name].create_indexes(models)
+
+    return index_names
+
+
+def get_index_sizes(database, collection_name):
+    return database.command("collStats", collection_name).get("indexSizes", dict())
+
+
+def _describe_plan(plan):
+    stage = f"{plan['stage']}({plan['indexName']})" if "indexName" in plan else plan["stage"]
+    if "inputStage" in plan:
+        return f"{stage} <- {_describe_plan(plan['inputStage'])}"
+    # OR and SORT_MERGE stages have several inputs.
+    if "inputStages" in plan:
+        return f"{stage} <- [{', '.join(_describe_plan(input_stage) for input_stage in plan['inputStages'])}]"
+    return stage
+
+
+def get_query_plan(database, collection_name, filter, sort=None):
+    cursor = database[collection_name].find(filter)
+    if sort:
+        cursor = cursor.sort(sort)
+    plan = cursor.explain()["queryPlanner"]["winningPlan"]
+    # With the slot-based engine (MongoDB 7+) the stages are under queryPlan.
+    return _describe_plan(plan.get("queryPlan", plan))
+
+
 def put_documents(database, collection_name, documents):
     if isinstance(documents, str):
         documents = [documents]
-    database[collection_name].insert_many(documents)
+    with metrics.timer(f"db.{collection_name}.insert_many"):
+        database[collection_name].insert_many(documents)
+    metrics.increment("db.round_trips")
+    metrics.increment(f"db.{collection_name}.documents_written", len(documents))
 
 
-def update_documents(database, collection_name, documents, unique_key, upsert=False):
-    if isinstance(documents, str):
+def _unique_value(unique_key, document):
+    if all(key.startswith("$") for key in document):
+        for operator in ["$set", "$setOnInsert"]:
+            try:
+                return get_value_from_document(unique_key, document.get(operator, dict()))
+            except KeyNotFoundError:
+                pass
+        raise KeyNotFoundError(unique_key, document)
+    return get_value_from_document(unique_key, document)
+
+
+def update_documents(database, collection_name, documents, unique_key, upsert=False, batch_size=1000, session=None):
+    # Uniqueness of unique_key is enforced by a unique index on the collection (see ensure_indexes), which makes
+    # a duplicated key fail the bulk write instead of being counted up front.
+    if isinstance(documents, dict):
         documents = [documents]
-    values = list()
+    operations = list()
     for document in documents:
-        value = get_value_from_document(unique_key, document)
-        doc_count = database[collection_name].count_documents({unique_key: value})
-        if doc_count > 1:
-            raise MultipleDocumentsError(database.name, collection_name, f"{{{unique_key}: {value}}}")
-        values.append(value)
+        filter = {unique_key: _unique_value(unique_key, document)}
+        if all(key.startswith("$") for key in document):
+            operations.append(UpdateOne(filter, document, upsert=upsert))
+        else:
+            operations.append(ReplaceOne(filter, document, upsert=upsert))
 
-    for document, value in zip(documents, values):
-        database[collection_name].update_one({unique_key: value}, document, upsert=upsert)
+    matched, upserted, modified = 0, 0, 0
+    for i in range(0, len(operations), batch_size):
+        result = _bulk_write(database, collection_name, operations[i : i + batch_size], upsert, session)
+        matched += result.matched
+        upserted += result.upserted
+        modified += result.modified
+    metrics.increment(f"db.{collection_name}.documents_written", upserted + modified)
+
+    return BulkUpdateResult(matched=matched, upserted=upserted, modified=modified)
+
+
+def _bulk_write(database, collection_name, operations, upsert, session, retry=True):
+    try:
+        with metrics.timer(f"db.{collection_name}.bulk_write"):
+            result = database[collection_name].bulk_write(operations, ordered=False, session=session)
+        metrics.increment("db.round_trips")
+        return BulkUpdateResult(result.matched_count, result.upserted_count, result.modified_count)
+    except BulkWriteError as error:
+        metrics.increment("db.round_trips")
+        write_errors = error.details.get("writeErrors", list())
+        if not write_errors or any(write_error.get("code") != DUPLICATE_KEY_ERROR for write_error in write_errors):
+            raise
+        filter = write_errors[0].get("op", dict()).get("q")
+        if not upsert:
+            raise MultipleDocumentsError(database.name, collection_name, filter)
+        # An upsert fails with a duplicate key when another writer inserts the same key between its match and its
+        # insert. Run again, the failed upserts match that document. Inside a transaction the error has already aborted
+        # it, so it is left to the caller.
+        if not retry or session is not None:
+            raise UpsertConflictError(database.name, collection_name, filter)
+        metrics.increment(f"db.{collection_name}.upsert_races", len(write_errors))
+        retried = _bulk_write(
+            database,
+            collection_name,
+            [operations[write_error["index"]] for write_error in write_errors],
+            upsert,
+            None,
+            False,
+        )
+        return BulkUpdateResult(
+            error.details.get("nMatched", 0) + retried.matched,
+            error.details.get("nUpserted", 0) + retried.upserted,
+            error.details.get("nModified", 0) + retried.modified,
+        )
+
+
+def blurb_key(game_id, player_id, source):
+    return f"{game_id}|{player_id}|{source}"
 
 
 def create_blurb_document(blurb, source, league):
-    player = blurb["player"]
+    player = blurb.player
     return {
+        BLURB_KEY: blurb_key(blurb.game_id, player.player_id, source),
         "date": datetime.datetime.utcnow(),
+        "game": {"id": blurb.game_id},
         "player": {
             "id": player.player_id,
             "name": player.name,  # sportsipy stores single name - should we split it to first & last?
@@ -60,10 +250,22 @@ def create_blurb_document(blurb, source, league):
             "team": player.team_abbreviation.upper(),
             "league": league.name,
         },
-        "blurb": {"source": source, "news": blurb["news"], "spin": blurb["spin"]},
+        "blurb": {"source": source, "news": blurb.news, "spin": blurb.spin},
     }
 
 
+def put_blurb_documents(database, blurb_documents, session=None):
+    # Blurbs are only inserted when their key is new, so retries, reruns and overlapping workers write each blurb once.
+    return update_documents(
+        database,
+        BLURB_COLLECTION,
+        [{"$setOnInsert": blurb_document} for blurb_document in blurb_documents],
+        BLURB_KEY,
+        upsert=True,
+        session=session,
+    )
+
+
 def create_blurb_documents(blurbs, source, league):
     blurb_documents = list()
     for blurb in blurbs:
@@ -72,31 +274,35 @@ def create_blurb_documents(blurbs, source, league):
     return blurb_documents
 
 
-def create_game_document(boxscore, league, processed=False):
-    away_score, home_score = game_score(boxscore)
-    winning_score, losing_score = (away_score, home_score) if away_score > home_score else (home_score, away_score)
+def create_game_document(game, league, processed=False):
+    if not isinstance(game, GameRecord):
+        game = GameRecord.from_boxscore(game)
+    home_score, away_score = game.home_score, game.away_score
+    winning_score, losing_score = (home_score, away_score) if game.complete else (None, None)
+    if game.complete and away_score > home_score:
+        winning_score, losing_score = away_score, home_score
     return {
         "date": datetime.datetime.utcnow(),
         "game": {
-            "id": boxscore._uri,
-            "date": boxscore.date,
+            "id": game.id,
+            "date": game.date,
             "teams": [
                 {
-                    "name": boxscore.winning_name,
-                    "abbreviation": boxscore.winning_abbr.upper(),
+                    "name": game.winning_name,
+                    "abbreviation": game.winning_abbr and game.winning_abbr.upper(),
                     "score": winning_score,
-                    "is_home": boxscore.winning_name == boxscore._home_name.text(),
+                    "is_home": game.winning_name == game.home_name,
                 },
                 {
-                    "name": boxscore.losing_name,
-                    "abbreviation": boxscore.losing_abbr.upper(),
+                    "name": game.losing_name,
+                    "abbreviation": game.losing_abbr and game.losing_abbr.upper(),
                     "score": losing_score,
-                    "is_home": boxscore.losing_name == boxscore._home_name.text(),
+                    "is_home": game.losing_name == game.home_name,
                 },
             ],
             "league": league.name,
         },
-        "complete": game_is_complete(boxscore),
+        "complete": game.complete,
         "processed": processed,
     }
 
@@ -8,6 +8,17 @@ class MultipleDocumentsError(SportBlurbsError):
         super().__init__(msg)
 
 
+class UpsertConflictError(SportBlurbsError):
+    def __init__(self, database_name, collection_name, filter):
+        msg = f"Upsert for filter '{filter}' into '{database_name}.{collection_name}' lost a race for its key."
+        super().__init__(msg)
+
+
 class KeyNotFoundError(SportBlurbsError):
     def __init__(self, key, document):
         super().__init__(f"Key '{key}' is not found in document '{document}'.")
+
+
+class OfflineCacheMissError(SportBlurbsError):
+    def __init__(self, url):
+        super().__init__(f"URL '{url}' is not in the response cache and cannot be fetched offline.")
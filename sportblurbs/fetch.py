@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+
+class RateLimiter:
+    def __init__(self, rate=None):
+        # rate is the maximum number of calls (or units of cost) per second; None disables limiting.
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_call = 0.0
+
+    def wait(self, cost=1):
+        # cost lets one call use up several units, e.g. the tokens of a completion request under a tokens/sec limit.
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_call - now
+            self._next_call = max(now, self._next_call) + self.interval * cost
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+def fetch_all(func, items, max_workers=1, rate_limiter=None):
+    def _fetch(item):
+        if rate_limiter:
+            rate_limiter.wait()
+        return func(item)
+
+    items = list(items)
+    if max_workers is None or max_workers <= 1 or len(items) <= 1:
+        return [_fetch(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(_fetch, items))
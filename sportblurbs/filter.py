@@ -1,4 +1,5 @@
 import logging
+from operator import attrgetter
 
 logger = logging.getLogger()
 
@@ -48,3 +49,81 @@ def filter_mlb_at_least_one_ab_or_ip(boxscore, player, player_boxscore):
     except TypeError:
         logger.debug(f"player {player_boxscore.name}'s boxscore attribute(s) could not be checked.", exc_info=True)
         return False
+
+
+# Frame filters take a DataFrame with one row per player boxscore and the stat columns they declare, and return a
+# boolean mask of the rows to keep. They run over a whole batch of boxscores before any player is fetched.
+def uses_columns(*columns):
+    def decorator(func):
+        func.columns = list(columns)
+        return func
+
+    return decorator
+
+
+def is_frame_filter(func):
+    return isinstance(getattr(func, "columns", None), list)
+
+
+def _read_stat(player_boxscore, column):
+    try:
+        return getattr(player_boxscore, column)
+    except TypeError:
+        logger.debug(f"player {player_boxscore.name}'s {column} attribute could not be read.", exc_info=True)
+        return None
+
+
+def _stat_column(player_boxscores, column):
+    read = attrgetter(column)
+    try:
+        return [read(player_boxscore) for player_boxscore in player_boxscores]
+    except TypeError:
+        # sportsipy raises TypeError for a stat missing from a player's row; only then is the column read cell by cell.
+        return [_read_stat(player_boxscore, column) for player_boxscore in player_boxscores]
+
+
+def player_stat_frame(player_boxscores, columns):
+    # Extraction is not vectorized: sportsipy only exposes a player's boxscore stats as properties parsed per player, so
+    # every column takes one property read per player and only the masks of the frame filters are vectorized. Building
+    # whole columns (see benchmarks/test_process_benchmarks.py::test_player_stat_frame) keeps the reads cheap, but the
+    # point of a frame filter is that the players it drops are never fetched, not that it reads stats any faster.
+    import pandas as pd
+
+    player_boxscores = list(player_boxscores)
+    frame = pd.DataFrame(
+        {
+            column: pd.to_numeric(pd.Series(_stat_column(player_boxscores, column), dtype=object), errors="coerce")
+            for column in columns
+        }
+    )
+    return frame.fillna(0)
+
+
+def filter_player_boxscores(pairs, frame_filters):
+    # pairs are (boxscore, player_boxscore) tuples; the ones that pass every frame filter are returned in order.
+    if callable(frame_filters):
+        frame_filters = [frame_filters]
+    pairs = list(pairs)
+    if not frame_filters:
+        return pairs
+    columns = list(dict.fromkeys(column for func in frame_filters for column in func.columns))
+    frame = player_stat_frame([player_boxscore for _, player_boxscore in pairs], columns)
+    mask = frame_filters[0](frame)
+    for func in frame_filters[1:]:
+        mask &= func(frame)
+    return [pair for pair, keep in zip(pairs, mask) if keep]
+
+
+@uses_columns("attempted_passes", "rush_attempts", "receptions", "field_goals_attempted")
+def frame_filter_nfl_at_least_one_att(frame):
+    return frame[frame_filter_nfl_at_least_one_att.columns].ne(0).any(axis=1)
+
+
+@uses_columns("minutes_played")
+def frame_filter_nba_at_least_one_minute_played(frame):
+    return frame["minutes_played"].ne(0)
+
+
+@uses_columns("at_bats", "innings_pitched")
+def frame_filter_mlb_at_least_one_ab_or_ip(frame):
+    return frame[frame_filter_mlb_at_least_one_ab_or_ip.columns].ne(0).any(axis=1)
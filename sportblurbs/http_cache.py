@@ -0,0 +1,156 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from sportblurbs import metrics
+from sportblurbs.exception import OfflineCacheMissError
+
+logger = logging.getLogger()
+
+# sportsipy fetches every page through pyquery (which calls requests.get) or sportsipy.utils (which calls requests.head
+# and requests.get), always looking the function up on the requests module. Keep the real functions so the cache can
+# reach the network after install() has replaced them.
+_request_get = requests.get
+_request_head = requests.head
+
+_installed_cache = None
+
+
+class ResponseCache:
+    def __init__(self, directory, offline=False):
+        # Bodies are stored gzipped and addressed by their sha256 under objects/, so identical pages are stored once.
+        # Each url has a small json entry under index/ pointing at its body along with the validators to revalidate it.
+        self.directory = directory
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "index"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+
+    def _index_path(self, url):
+        return os.path.join(self.directory, "index", hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest + ".gz")
+
+    def _write(self, path, data):
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+
+    def _load_entry(self, url):
+        try:
+            with open(self._index_path(url)) as index_file:
+                return json.load(index_file)
+        except FileNotFoundError:
+            return None
+
+    def _load_body(self, entry):
+        with gzip.open(self._object_path(entry["body"]), "rb") as object_file:
+            return object_file.read()
+
+    def _store(self, url, response):
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        if not os.path.exists(self._object_path(digest)):
+            self._write(self._object_path(digest), gzip.compress(body))
+        entry = {
+            "url": url,
+            "status_code": response.status_code,
+            "encoding": response.encoding,
+            "headers": {
+                header: response.headers[header]
+                for header in ["Content-Type", "ETag", "Last-Modified"]
+                if header in response.headers
+            },
+            "body": digest,
+        }
+        self._write(self._index_path(url), json.dumps(entry).encode())
+        return entry
+
+    def _response(self, entry, body=None):
+        response = requests.models.Response()
+        response.url = entry["url"]
+        response.status_code = entry["status_code"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = entry["encoding"]
+        response._content = self._load_body(entry) if body is None else body
+        return response
+
+    def get(self, url, **kwargs):
+        entry = self._load_entry(url)
+        if self.offline:
+            if entry is None:
+                with self._lock:
+                    self.misses += 1
+                metrics.increment("cache.http.misses")
+                raise OfflineCacheMissError(url)
+            with self._lock:
+                self.hits += 1
+            metrics.increment("cache.http.hits")
+            return self._response(entry)
+
+        headers = dict(kwargs.pop("headers", None) or dict())
+        if entry is not None:
+            if "ETag" in entry["headers"]:
+                headers["If-None-Match"] = entry["headers"]["ETag"]
+            if "Last-Modified" in entry["headers"]:
+                headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        with metrics.timer("http.get"):
+            response = _request_get(url, headers=headers, **kwargs)
+        metrics.increment("http.requests")
+        if entry is not None and response.status_code == 304:
+            logger.debug(f"'{url}' not modified; serving it from the response cache.")
+            with self._lock:
+                self.hits += 1
+                self.revalidated += 1
+            metrics.increment("cache.http.hits")
+            return self._response(entry)
+
+        with self._lock:
+            self.misses += 1
+        metrics.increment("cache.http.misses")
+        # Only successful pages are kept; error pages (429s, transient 404s) would otherwise be replayed offline and
+        # revalidated as if they were the page.
+        if 200 <= response.status_code < 300:
+            self._store(url, response)
+        return response
+
+    def head(self, url, **kwargs):
+        entry = self._load_entry(url)
+        if entry is not None:
+            return self._response(entry, body=b"")
+        if self.offline:
+            raise OfflineCacheMissError(url)
+        return _request_head(url, **kwargs)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "revalidated": self.revalidated}
+
+
+def install(cache):
+    global _installed_cache
+    _installed_cache = cache
+    requests.get = cache.get
+    requests.head = cache.head
+
+
+def uninstall():
+    global _installed_cache
+    _installed_cache = None
+    requests.get = _request_get
+    requests.head = _request_head
+
+
+def installed_cache():
+    return _installed_cache
@@ -1,28 +1,42 @@
+from bisect import bisect_right
 from datetime import datetime, timedelta
+from functools import lru_cache
+import importlib
+import json
+import os
 
-import sportsipy.mlb
-import sportsipy.mlb.boxscore
-import sportsipy.mlb.roster
-
-import sportsipy.nfl
-import sportsipy.nfl.boxscore
-import sportsipy.nfl.roster
-from sportsipy.nfl.schedule import Schedule
-
-import sportsipy.nba
-import sportsipy.nba.boxscore
-import sportsipy.nba.roster
+from sportblurbs import metrics
+from sportblurbs.fetch import RateLimiter, fetch_all
+from sportblurbs.record import PlayerRef
 
 
 class League:
-    def __init__(self, name, league_module, season_start, multiyear=False):
+    def __init__(
+        self, name, league_module, season_start, multiyear=False, max_workers=1, rate_limit=None, player_cache=None
+    ):
         self.name = name
-        self.league_module = league_module
+        # league_module may be given as a module name ("sportsipy.nfl"), in which case it (along with its boxscore and
+        # roster modules, and with them pandas, lxml and pyquery) is only imported the first time it is used.
+        self._league_module = league_module
         self.season_start = season_start
         self.multiyear = multiyear
+        self.max_workers = max_workers
+        # Each league is served by its own sports-reference host, so one rate limiter per league is per-host.
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.player_cache = player_cache
         self._boxscores = dict()
 
-    def get_season(self, date=datetime.utcnow()):
+    @property
+    def league_module(self):
+        if isinstance(self._league_module, str):
+            for submodule in ["boxscore", "roster"]:
+                importlib.import_module(f"{self._league_module}.{submodule}")
+            self._league_module = importlib.import_module(self._league_module)
+        return self._league_module
+
+    def get_season(self, date=None):
+        if date is None:
+            date = datetime.utcnow()
         if date < datetime(year=date.year, month=self.season_start[0], day=self.season_start[1]):
             season = date.year - 1
         else:
@@ -31,97 +45,225 @@ class League:
             season = f"{season}-{int(str(season)[2:]) + 1}"
         return season
 
+    def _cached_player(self, player_id, season):
+        if self.player_cache is None:
+            return None
+        return self.player_cache.get((self.name, player_id, str(season)))
+
+    def _fetch_player(self, player_id, season):
+        # Only players fetched from sports-reference wait on the rate limiter; cache hits are never throttled.
+        self.rate_limiter.wait()
+        with metrics.timer("fetch.player"):
+            player = self.league_module.roster.Player(player_id)(str(season))
+        metrics.increment("fetches.player")
+        # Only the PlayerRef is kept (and cached), so the sportsipy Player, with every season's stats, is released here.
+        player = PlayerRef.from_player(player)
+        if self.player_cache is not None:
+            self.player_cache.put((self.name, player_id, str(season)), player)
+        return player
+
     def get_player(self, player_id, season=None):
         if not season:
             season = self.get_season()
-        return self.league_module.roster.Player(player_id)(str(season))
+        player = self._cached_player(player_id, season)
+        return player if player is not None else self._fetch_player(player_id, season)
+
+    def get_players(self, player_ids, season=None):
+        if not season:
+            season = self.get_season()
+        players = {player_id: self._cached_player(player_id, season) for player_id in dict.fromkeys(player_ids)}
+        missing = [player_id for player_id, player in players.items() if player is None]
+        fetched = fetch_all(lambda player_id: self._fetch_player(player_id, season), missing, self.max_workers)
+        players.update(zip(missing, fetched))
+        return players
 
-    def get_games(self, date=datetime.utcnow()):
-        return self.league_module.boxscore.Boxscores(date).games[self.date_string(date)]
+    def get_games(self, date=None):
+        if date is None:
+            date = datetime.utcnow()
+        with metrics.timer("fetch.games"):
+            games = self.league_module.boxscore.Boxscores(date).games[self.date_string(date)]
+        metrics.increment("fetches.games")
+        return games
 
-    def get_boxscores(self, date=datetime.utcnow()):
-        date_string = self.date_string(date)
-        if date_string not in self._boxscores:
-            games = self.get_games(date)
-            self._boxscores[date_string] = [self.league_module.boxscore.Boxscore(game["boxscore"]) for game in games]
-        return self._boxscores[date_string]
+    def get_boxscore(self, uri):
+        with metrics.timer("fetch.boxscore"):
+            boxscore = self.league_module.boxscore.Boxscore(uri)
+        metrics.increment("fetches.boxscore")
+        return boxscore
+
+    def get_boxscores(self, date=None):
+        if date is None:
+            date = datetime.utcnow()
+        return self.get_boxscores_for_dates([date])
+
+    def get_boxscores_for_dates(self, dates):
+        # Fan out over every uncached date at once: first the schedule pages, then every boxscore page in one pool.
+        date_strings = [self.date_string(date) for date in dates]
+        missing = {
+            date_string: date for date_string, date in zip(date_strings, dates) if date_string not in self._boxscores
+        }
+        if missing:
+            games = fetch_all(self.get_games, missing.values(), self.max_workers, self.rate_limiter)
+            uris = [game["boxscore"] for date_games in games for game in date_games]
+            boxscores = iter(fetch_all(self.get_boxscore, uris, self.max_workers, self.rate_limiter))
+            for date_string, date_games in zip(missing, games):
+                self._boxscores[date_string] = [next(boxscores) for _ in date_games]
+
+        boxscores = list()
+        for date_string in date_strings:
+            boxscores.extend(self._boxscores[date_string])
+        return boxscores
+
+    def get_games_for_dates(self, dates):
+        games = fetch_all(self.get_games, dates, self.max_workers, self.rate_limiter)
+        return [game for date_games in games for game in date_games]
+
+    def get_boxscores_for_uris(self, uris):
+        return fetch_all(self.get_boxscore, uris, self.max_workers, self.rate_limiter)
+
+    def iter_boxscores(self, dates):
+        # Unlike get_boxscores_for_dates, nothing is kept in self._boxscores, so memory stays flat over long ranges.
+        for date in dates:
+            self.rate_limiter.wait()
+            uris = [game["boxscore"] for game in self.get_games(date)]
+            yield from fetch_all(self.get_boxscore, uris, self.max_workers, self.rate_limiter)
 
     @staticmethod
     def date_string(date):
         return date.strftime("%-m-%-d-%Y")
 
 
+NFL_WEEKS_PATH = os.path.join(os.path.dirname(__file__), "data", "nfl_weeks.json")
+
+
+def _parse_date(date_string):
+    return datetime.strptime(date_string, "%Y-%m-%d")
+
+
+@lru_cache(maxsize=None)
+def load_nfl_weeks(path=NFL_WEEKS_PATH):
+    # The starts (Tuesdays, as NFL weeks run Tuesday to Monday) of the preseason weeks, of week one and of the four
+    # postseason rounds, along with the number of regular season weeks, of every season in the shipped index.
+    with open(path) as weeks_file:
+        return {
+            int(season): (
+                [_parse_date(date_string) for date_string in weeks["preseason"]],
+                _parse_date(weeks["week_one"]),
+                weeks["weeks"],
+                [_parse_date(date_string) for date_string in weeks["postseason"]],
+            )
+            for season, weeks in json.load(weeks_file).items()
+        }
+
+
+def nfl_week_starts(preseason, week_one, num_weeks, postseason):
+    # Returns the start of every week of a season along with its identifier: "P1", "P2", ... for the preseason, 1 to
+    # num_weeks for the regular season and num_weeks + 1 to num_weeks + 4 for the wild card, divisional, conference
+    # and Super Bowl rounds (as sports-reference numbers them). The offseason, which starts the week after the Super
+    # Bowl, is None.
+    week_starts = [(start, f"P{w}") for w, start in enumerate(preseason, start=1)]
+    week_starts.extend((week_one + timedelta(weeks=w), w + 1) for w in range(num_weeks))
+    week_starts.extend((start, num_weeks + w) for w, start in enumerate(postseason, start=1))
+    week_starts.append((postseason[-1] + timedelta(weeks=1), None))
+    return [start for start, _ in week_starts], [week for _, week in week_starts]
+
+
 class NflLeague(League):
-    def __init__(self, name, league_module, season_start, multiyear=False):
+    def __init__(
+        self,
+        name,
+        league_module,
+        season_start,
+        multiyear=False,
+        max_workers=1,
+        rate_limit=None,
+        player_cache=None,
+        schedule_cache=None,
+    ):
+        # Week starts come from the shipped index; seasons outside it are built from a team schedule once and kept in
+        # schedule_cache (a cache.Cache), so they are only fetched once when that cache is on disk.
         self._schedule = dict()
-        super().__init__(name, league_module, season_start, multiyear)
+        self.schedule_cache = schedule_cache
+        super().__init__(name, league_module, season_start, multiyear, max_workers, rate_limit, player_cache)
 
     def _build_schedule(self, season):
-        # TODO: Handle building when season does not exist (too old or in future)
+        nfl_weeks = load_nfl_weeks()
+        if int(season) in nfl_weeks:
+            self._schedule[season] = nfl_week_starts(*nfl_weeks[int(season)])
+            return
+        if self.schedule_cache is not None:
+            week_starts = self.schedule_cache.get(("NFL", season, "weeks"))
+            if week_starts is not None:
+                self._schedule[season] = week_starts
+                return
+
         # Here we're just using the sportsipy team Schedule class to get a generic NFL season schedule.  Any team would
         # work, but the Pats work the best.
+        from sportsipy.nfl.schedule import Schedule
+
         patriots_schedule = Schedule("NWE", season)
         season_start_dt = patriots_schedule.dataframe["datetime"].iloc[0]
         # Subtract one day from season_start_dt in case the Pats open on Monday night
         season_start_dt = season_start_dt - timedelta(days=1)
         # Back up season_start_dt to Tuesday (we consider a NFL week to go from Tuesday to Monday)
         season_start_dt = season_start_dt - timedelta(days=season_start_dt.weekday() - 1)
-        self._schedule[season] = [season_start_dt + timedelta(weeks=w) for w in range(self.season_length(season))]
+        num_weeks = self.season_length(season)
+        # Before the shipped index there were four preseason weeks and, from 2003 on, a bye week before the Super Bowl.
+        preseason = [season_start_dt - timedelta(weeks=w) for w in range(4, 0, -1)]
+        postseason = [season_start_dt + timedelta(weeks=num_weeks + w) for w in range(3)]
+        postseason.append(postseason[-1] + timedelta(weeks=2 if int(season) >= 2003 else 1))
+        self._schedule[season] = nfl_week_starts(preseason, season_start_dt, num_weeks, postseason)
+        if self.schedule_cache is not None:
+            self.schedule_cache.put(("NFL", season, "weeks"), self._schedule[season])
 
-    def get_games(self, date=datetime.utcnow()):
-        if isinstance(date, datetime):
+    def get_games(self, date=None):
+        if date is None or isinstance(date, datetime):
             date = self.get_week(date)
 
-        return self.league_module.boxscore.Boxscores(week=date[0], year=date[1]).games[self.date_string(date)]
+        season, week = date
+        # sports-reference has no pages for preseason weeks.
+        if not isinstance(week, int):
+            return list()
+        with metrics.timer("fetch.games"):
+            games = self.league_module.boxscore.Boxscores(week=week, year=season).games[f"{week}-{season}"]
+        metrics.increment("fetches.games")
+        return games
+
+    def get_boxscores(self, date=None):
+        if date is None or isinstance(date, datetime):
+            date = self.get_week(date)
+        return self.get_boxscores_for_dates([date])
 
-    def get_week(self, date=datetime.utcnow()):
-        # TODO: Extend to include preseason and postseason weeks
+    def get_week(self, date=None):
+        if date is None:
+            date = datetime.utcnow()
         season = self.get_season(date)
         if season not in self._schedule:
             self._build_schedule(season)
 
-        week = "preseason"
-        week_num, week_dt = None, None
-        for week_num, week_dt in enumerate(self._schedule[season], start=1):
-            if date < week_dt:
-                return season, week
-            else:
-                week = week_num
-
-        if date < (week_dt + timedelta(days=7)):
-            return season, week
-
-        return season, "postseason"
+        week_starts, weeks = self._schedule[season]
+        index = bisect_right(week_starts, date)
+        if index == 0:
+            return season, None
+        return season, weeks[index - 1]
 
     def get_weeks(self, start_date, end_date):
-        start_season, start_week = self.get_week(start_date)
-        end_season, end_week = self.get_week(end_date)
-
-        if start_week == "preseason":
-            start_week = 1
-        if start_week == "postseason":
-            start_season = int(start_season) + 1
-            start_week = 1
-        if end_week == "preseason":
-            end_season = int(end_season) - 1
-            end_week = self.season_length(end_season)
-        if end_week == "postseason":
-            end_week = self.season_length(end_season)
-
+        # Every regular and postseason week that overlaps the range; preseason weeks have no games to fetch.
         weeks = list()
-        temp_season, temp_week = start_season, start_week
-        while temp_season < end_season or (temp_season == end_season and temp_week <= end_week):
-            weeks.append((temp_season, temp_week))
-            if int(temp_week) < self.season_length(temp_season):
-                temp_week = int(temp_week) + 1
-            else:
-                temp_season = int(temp_season) + 1
-                temp_week = 1
-
+        for season in range(int(self.get_season(start_date)), int(self.get_season(end_date)) + 1):
+            if season not in self._schedule:
+                self._build_schedule(season)
+            week_starts, season_weeks = self._schedule[season]
+            for week_start, week_end, week in zip(week_starts, week_starts[1:], season_weeks):
+                if isinstance(week, int) and week_start <= end_date and week_end > start_date:
+                    weeks.append((season, week))
         return weeks
 
     @staticmethod
     def season_length(season):
+        nfl_weeks = load_nfl_weeks()
+        if int(season) in nfl_weeks:
+            return nfl_weeks[int(season)][2]
         # TODO: Add logic for season length for thee olden-days
         return 18 if int(season) >= 2021 else 17
 
@@ -130,6 +272,6 @@ class NflLeague(League):
         return str(date[0]) + "-" + str(date[1])
 
 
-mlb = League("MLB", sportsipy.mlb, season_start=(3, 15))
-nfl = NflLeague("NFL", sportsipy.nfl, season_start=(8, 1))
-nba = League("NBA", sportsipy.nba, season_start=(9, 15), multiyear=True)
+mlb = League("MLB", "sportsipy.mlb", season_start=(3, 15))
+nfl = NflLeague("NFL", "sportsipy.nfl", season_start=(8, 1))
+nba = League("NBA", "sportsipy.nba", season_start=(9, 15), multiyear=True)
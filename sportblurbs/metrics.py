@@ -0,0 +1,109 @@
+from collections import Counter
+from contextlib import contextmanager
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+
+class Metrics:
+    def __init__(self):
+        self.timers = dict()
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timer = self.timers.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            timer["count"] += 1
+            timer["total"] += seconds
+            timer["max"] = max(timer["max"], seconds)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def report(self):
+        with self._lock:
+            return {
+                "timers": {name: dict(timer) for name, timer in sorted(self.timers.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+
+    def write_json(self, path):
+        _write_atomically(path, json.dumps(self.report(), indent=2))
+
+    def write_prometheus(self, path):
+        # Text exposition format for the node_exporter textfile collector.
+        report = self.report()
+        lines = list()
+        for name, timer in report["timers"].items():
+            metric = _prometheus_name(name) + "_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            lines.append(f"{metric}_sum {timer['total']}")
+            lines.append(f"{metric}_count {timer['count']}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            lines.append(f"{metric}_max {timer['max']}")
+        for name, value in report["counters"].items():
+            metric = _prometheus_name(name) + "_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        _write_atomically(path, "\n".join(lines) + "\n")
+
+
+class NullMetrics(Metrics):
+    @contextmanager
+    def timer(self, name):
+        yield
+
+    def observe(self, name, seconds):
+        pass
+
+    def increment(self, name, value=1):
+        pass
+
+
+def _prometheus_name(name):
+    return "sportblurbs_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _write_atomically(path, text):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(fd, "w") as temp_file:
+        temp_file.write(text)
+    os.replace(temp_path, path)
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    return _metrics
+
+
+def set_metrics(metrics):
+    global _metrics
+    _metrics = metrics
+
+
+def timer(name):
+    return _metrics.timer(name)
+
+
+def increment(name, value=1):
+    _metrics.increment(name, value)
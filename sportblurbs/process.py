@@ -1,57 +1,156 @@
 import logging
 
+from sportblurbs import metrics
+from sportblurbs.context import GameContext
 from sportblurbs.database import (
     create_blurb_documents,
     create_game_document,
+    ensure_indexes,
     get_database,
-    get_document,
-    put_documents,
+    get_documents_by_key,
+    put_blurb_documents,
     update_documents,
     GAME_COLLECTION,
-    BLURB_COLLECTION,
+    GAME_ID_KEY,
+    GAME_PROJECTION,
+    GAME_STATE_PROJECTION,
 )
-from sportblurbs.utils import game_is_complete
-from sportblurbs.writer import write_generic_player_news, write_null_spin, write_player_blurbs_from_boxscore
+from sportblurbs.utils import chunked
+from sportblurbs.writer import write_generic_player_news, write_null_spin, write_player_blurbs_from_boxscores
 
 
 logger = logging.getLogger()
 
 
-def process_games(dates, league, new_func=write_generic_player_news, spin_func=write_null_spin, filters=None):
-    logger.info("Getting boxscores...")
-    boxscores = list()
-    for date in dates:
-        logger.debug(f"Getting boxscores from '{league.date_string(date)}'.")
-        boxscores.extend(league.get_boxscores(date))
+def process_games(
+    dates,
+    league,
+    new_func=write_generic_player_news,
+    spin_func=write_null_spin,
+    filters=None,
+    database=None,
+    chunk_size=None,
+    incremental=False,
+    transactional=False,
+):
+    if database is None:
+        database = get_database()
+    ensure_indexes(database)
 
-    database = get_database()
+    if incremental:
+        # Incremental mode: the schedule-level games (which carry scores) are checked against the game collection first
+        # and boxscores are only built for games that have completed but are not yet processed.
+        logger.info("Getting games to process...")
+        with metrics.timer("stage.fetch_games"):
+            games = league.get_games_for_dates(dates)
+        uris = get_uris_to_process(games, database)
+        logger.info(f"Processing {len(uris)} newly completed games...")
+        boxscore_chunks = (
+            league.get_boxscores_for_uris(chunk) for chunk in chunked(uris, chunk_size or len(uris) or 1)
+        )
+    elif chunk_size:
+        # Streaming mode: boxscores are fetched date by date without being cached on the league and are processed and
+        # written every chunk_size games, so memory stays flat over the range and a failure loses at most one chunk.
+        logger.info(f"Processing games in chunks of {chunk_size}...")
+        boxscore_chunks = chunked(league.iter_boxscores(dates), chunk_size)
+    else:
+        logger.info("Getting boxscores...")
+        logger.debug(f"Getting boxscores from {', '.join(repr(league.date_string(date)) for date in dates)}.")
+        with metrics.timer("stage.fetch_boxscores"):
+            boxscore_chunks = [league.get_boxscores_for_dates(dates)]
+
+    for boxscores in boxscore_chunks:
+        process_boxscores(boxscores, league, database, new_func, spin_func, filters, transactional)
+    logger.info("Processing complete.")
+
+
+def get_uris_to_process(games, database):
+    with metrics.timer("stage.game_state"):
+        game_docs = get_documents_by_key(
+            database, GAME_COLLECTION, GAME_ID_KEY, [game["boxscore"] for game in games], GAME_STATE_PROJECTION
+        )
+    uris = list()
+    for game in games:
+        game_doc = game_docs.get(game["boxscore"])
+        # Games without a score are left until they have one; a boxscore is only built for a game that is complete.
+        if game["home_score"] is not None and (game_doc is None or not game_doc["processed"]):
+            uris.append(game["boxscore"])
+        else:
+            metrics.increment("games.skipped")
+
+    return uris
+
+
+def process_boxscores(
+    boxscores,
+    league,
+    database,
+    new_func=write_generic_player_news,
+    spin_func=write_null_spin,
+    filters=None,
+    transactional=False,
+):
+    # Each boxscore is wrapped in a GameContext once here, and that context is what the game document, the filters and
+    # the news functions see. Every reference to the boxscores is dropped once the game documents and BlurbRecords are
+    # built, so when the caller passes a list it does not keep, the boxscores (and their parsed pages) are released
+    # before the writes.
+    contexts = [GameContext.of(boxscore) for boxscore in boxscores]
+    del boxscores
+    logger.info("Getting game documents...")
+    with metrics.timer("stage.game_state"):
+        game_docs = get_documents_by_key(
+            database, GAME_COLLECTION, GAME_ID_KEY, [context._uri for context in contexts], GAME_PROJECTION
+        )
     logger.info("Writing player blurbs...")
-    blurbs = list()
+    boxscores_to_write, new_or_updated_boxscores = get_game_states(contexts, game_docs, league)
+    del contexts
+    with metrics.timer("stage.write_blurbs"):
+        blurbs = write_player_blurbs_from_boxscores(boxscores_to_write, league, new_func, spin_func, filters)
+    metrics.increment("games.processed", len(boxscores_to_write))
+    del boxscores_to_write
+
+    source = "sports-reference.com"
+    logger.info("Creating blurb docs...")
+    blurb_docs = create_blurb_documents(blurbs, source, league)
+    if transactional:
+        # Blurbs and the game states that mark them written commit together (with_transaction retries transient errors),
+        # which needs a replica set or sharded cluster.
+        with database.client.start_session() as session:
+            session.with_transaction(
+                lambda session: write_documents(database, blurb_docs, new_or_updated_boxscores.values(), session)
+            )
+    else:
+        write_documents(database, blurb_docs, new_or_updated_boxscores.values())
+
+
+def get_game_states(boxscores, game_docs, league):
+    boxscores_to_write = list()
     new_or_updated_boxscores = dict()
     for boxscore in boxscores:
         logger.debug(f"Checking document for '{str(boxscore)}'.")
-        game_doc = get_document(database, GAME_COLLECTION, {"game.id": boxscore._uri})
-        if not game_doc:
+        game_doc = game_docs.get(boxscore._uri)
+        # Documents of games stored before they had a score are built again, since only then are the teams known.
+        if not game_doc or (boxscore.complete and not game_doc["complete"]):
             game_doc = create_game_document(boxscore, league)
             new_or_updated_boxscores.update({boxscore._uri: game_doc})
-        game_doc["complete"] = game_is_complete(boxscore)
+        game_doc["complete"] = boxscore.complete
         if game_doc["complete"] and not game_doc["processed"]:
-            blurbs.extend(write_player_blurbs_from_boxscore(boxscore, league, new_func, spin_func, filters))
+            boxscores_to_write.append(boxscore)
             game_doc["processed"] = True
             new_or_updated_boxscores.update({boxscore._uri: game_doc})
+    return boxscores_to_write, new_or_updated_boxscores
 
-    # TODO: Add logic to reset database states on failures? Or at least retry retry-able failures and log info to fix.
-    source = "sports-reference.com"
-    if blurbs:
-        logger.info("Creating blurb docs...")
-        blurb_docs = create_blurb_documents(blurbs, source, league)
+
+def write_documents(database, blurb_docs, game_docs, session=None):
+    # Blurbs go in before the games are marked processed, and blurbs are keyed, so a failure in between only means the
+    # games are processed again and their blurbs are skipped as already written.
+    if blurb_docs:
         logger.info("Putting blurbs into database...")
-        put_documents(database, BLURB_COLLECTION, blurb_docs)
+        put_blurb_documents(database, blurb_docs, session=session)
     else:
         logger.info("No blurbs written.")
-    if new_or_updated_boxscores:
+    if game_docs:
         logger.info("Putting new and updated games into database...")
-        update_documents(database, GAME_COLLECTION, new_or_updated_boxscores.values(), "game.id", upsert=True)
+        update_documents(database, GAME_COLLECTION, game_docs, GAME_ID_KEY, upsert=True, session=session)
     else:
         logger.info("No new or updated games.")
-    logger.info("Processing complete.")
@@ -0,0 +1,201 @@
+from datetime import datetime
+import json
+import logging
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+
+import requests
+
+from sportblurbs import metrics
+from sportblurbs.database import get_database, BLURB_COLLECTION, BLURB_KEY, PUBLISHER_COLLECTION
+
+logger = logging.getLogger()
+
+INSERT_PIPELINE = [{"$match": {"operationType": "insert"}}]
+
+
+def create_blurb_notification(blurb_document):
+    # Consumers can drop notifications they have already seen by key, since a restart may deliver a batch twice.
+    return {
+        "id": str(blurb_document["_id"]),
+        "key": blurb_document.get(BLURB_KEY),
+        "date": blurb_document["date"].isoformat(),
+        "game": blurb_document.get("game"),
+        "player": blurb_document["player"],
+        "blurb": blurb_document["blurb"],
+    }
+
+
+def _batch_payload(notifications):
+    return json.dumps({"blurbs": notifications})
+
+
+class WebhookSink:
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, notifications):
+        response = requests.post(
+            self.url,
+            data=_batch_payload(notifications),
+            headers={"Content-Type": "application/json"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+
+class UnixSocketSink:
+    def __init__(self, path, timeout=10):
+        # Every batch is one line of JSON on a new connection to the consumer's socket.
+        self.path = path
+        self.timeout = timeout
+
+    def send(self, notifications):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as unix_socket:
+            unix_socket.settimeout(self.timeout)
+            unix_socket.connect(self.path)
+            unix_socket.sendall(_batch_payload(notifications).encode() + b"\n")
+
+
+class FileSpoolSink:
+    def __init__(self, directory):
+        # Every batch is a JSON file named so that the spool lists in delivery order. Files are written under a dotted
+        # temporary name and renamed into place, so a consumer never sees a partial batch.
+        self.directory = directory
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, notifications):
+        self._sequence += 1
+        path = os.path.join(self.directory, f"{time.time_ns():020d}-{self._sequence:06d}.json")
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".")
+        with os.fdopen(fd, "w") as temp_file:
+            temp_file.write(_batch_payload(notifications))
+        os.replace(temp_path, path)
+
+
+class Publisher:
+    def __init__(
+        self,
+        sink,
+        database=None,
+        name="blurbs",
+        batch_size=100,
+        batch_interval=0.5,
+        queue_size=1000,
+        max_backoff=60,
+        max_await=1.0,
+    ):
+        # New blurbs are read from a change stream on the blurb collection (which needs a replica set or sharded cluster)
+        # and sent to sink in batches of up to batch_size, waiting at most batch_interval seconds to fill a batch. The
+        # resume token of the last blurb of a batch is saved under name once the sink has taken the batch, so a restarted
+        # publisher picks up right after the last delivered blurb.
+        self.sink = sink
+        self.database = database if database is not None else get_database()
+        self.name = name
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.max_backoff = max_backoff
+        self.max_await = max_await
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._error = None
+
+    @property
+    def state_collection(self):
+        return self.database[PUBLISHER_COLLECTION]
+
+    def resume_token(self):
+        state = self.state_collection.find_one({"_id": self.name})
+        return state["resume_token"] if state else None
+
+    def save_resume_token(self, resume_token):
+        self.state_collection.update_one(
+            {"_id": self.name}, {"$set": {"resume_token": resume_token, "updated": datetime.utcnow()}}, upsert=True
+        )
+
+    def _put(self, item):
+        # The queue is bounded, so while the sink is behind the change stream is not read any further and the server
+        # holds on to the changes instead of this process.
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=self.max_await)
+                return
+            except queue.Full:
+                metrics.increment("publish.queue_full")
+
+    def watch(self):
+        with self.database[BLURB_COLLECTION].watch(
+            INSERT_PIPELINE, resume_after=self.resume_token(), max_await_time_ms=int(self.max_await * 1000)
+        ) as stream:
+            while not self._stop.is_set():
+                change = stream.try_next()
+                if change is not None:
+                    self._put((create_blurb_notification(change["fullDocument"]), change["_id"]))
+
+    def _watch(self):
+        try:
+            self.watch()
+        except Exception as error:
+            self._error = error
+            self._stop.set()
+
+    def next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.max_await)]
+        except queue.Empty:
+            return list()
+        deadline = time.monotonic() + self.batch_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def publish(self, batch):
+        # A batch is retried with exponential backoff until the sink takes it or the publisher is stopped.
+        notifications = [notification for notification, _ in batch]
+        backoff = min(1, self.max_backoff)
+        while True:
+            try:
+                with metrics.timer("publish.send"):
+                    self.sink.send(notifications)
+                break
+            except Exception:
+                logger.exception(f"Sending {len(notifications)} blurbs failed, retrying in {backoff}s.")
+                metrics.increment("publish.sink_errors")
+                if self._stop.wait(backoff):
+                    return False
+                backoff = min(backoff * 2, self.max_backoff)
+        self.save_resume_token(batch[-1][1])
+        metrics.increment("publish.batches")
+        metrics.increment("publish.notifications", len(notifications))
+        return True
+
+    def run(self, max_batches=None):
+        thread = threading.Thread(target=self._watch, daemon=True)
+        thread.start()
+        batches = 0
+        try:
+            while not self._stop.is_set():
+                batch = self.next_batch()
+                if batch and self.publish(batch):
+                    batches += 1
+                    logger.debug(f"Published {len(batch)} blurbs.")
+                    if max_batches is not None and batches >= max_batches:
+                        break
+        finally:
+            self._stop.set()
+            thread.join()
+        if self._error is not None:
+            raise self._error
+        return batches
+
+    def stop(self):
+        self._stop.set()
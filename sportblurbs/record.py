@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+import logging
+
+from .context import GameContext
+
+logger = logging.getLogger()
+
+
+# Lightweight copies of the few fields the pipeline reads from sportsipy objects, so the heavy Player and Boxscore
+# objects (season dataframes, parsed pages) can be released as soon as a blurb or game is extracted from them.
+@dataclass
+class PlayerRef:
+    __slots__ = ("player_id", "name", "position", "team_abbreviation")
+    player_id: str
+    name: str
+    position: str
+    team_abbreviation: str
+
+    @classmethod
+    def from_player(cls, player):
+        # sportsipy raises TypeError for fields of a player with no row for the season. Those are kept as None, so
+        # filter.filter_player_has_position and filter_player_has_team drop the player instead of the batch failing.
+        return cls(*(_read_field(player, field) for field in cls.__slots__))
+
+
+def _read_field(player, field):
+    try:
+        return getattr(player, field)
+    except TypeError:
+        logger.debug(f"player {player.player_id}'s {field} attribute could not be read.", exc_info=True)
+        return None
+
+
+@dataclass
+class BlurbRecord:
+    __slots__ = ("player", "news", "spin", "game_id")
+    player: PlayerRef
+    news: str
+    spin: str
+    game_id: str
+
+
+@dataclass
+class GameRecord:
+    __slots__ = (
+        "id",
+        "date",
+        "home_name",
+        "home_score",
+        "away_score",
+        "winning_name",
+        "winning_abbr",
+        "losing_name",
+        "losing_abbr",
+    )
+    id: str
+    date: str
+    home_name: str
+    home_score: int
+    away_score: int
+    winning_name: str
+    winning_abbr: str
+    losing_name: str
+    losing_abbr: str
+
+    @classmethod
+    def from_boxscore(cls, boxscore):
+        context = GameContext.of(boxscore)
+        if not context.complete:
+            # sportsipy cannot tell the winner (or the abbreviations) of a game with no score yet, so only the names are
+            # kept, home team first. The game's document is built again once it is complete.
+            home_name = boxscore._home_name.text()
+            return cls(
+                boxscore._uri, boxscore.date, home_name, None, None, home_name, None, boxscore._away_name.text(), None
+            )
+        return cls(
+            boxscore._uri,
+            boxscore.date,
+            boxscore._home_name.text(),
+            context.home_score,
+            context.away_score,
+            boxscore.winning_name,
+            boxscore.winning_abbr,
+            boxscore.losing_name,
+            boxscore.losing_abbr,
+        )
+
+    @property
+    def complete(self):
+        return self.home_score is not None
@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from sportblurbs import metrics
+from sportblurbs.cache import Cache
+from sportblurbs.fetch import RateLimiter, fetch_all
+from sportblurbs.utils import chunked
+
+logger = logging.getLogger()
+
+# Bump PROMPT_VERSION whenever SPIN_PROMPT changes so cached spins written with the old prompt are not reused.
+PROMPT_VERSION = "1"
+# Spins are kept here between runs unless another path is given.
+SPIN_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "sportblurbs", "spin.sqlite")
+SPIN_PROMPT = (
+    "Write one sentence of fantasy sports analysis about the following news. Do not repeat the news.\n\n"
+    "News: {news}\n\n"
+    "Analysis:"
+)
+
+
+def retryable_errors():
+    # openai is only imported once a spin is requested; it takes longer to import than the rest of the package.
+    import openai
+
+    return (
+        openai.error.APIConnectionError,
+        openai.error.APIError,
+        openai.error.RateLimitError,
+        openai.error.ServiceUnavailableError,
+        openai.error.TryAgain,
+    )
+
+
+def spin_cache(path=SPIN_CACHE_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return Cache(path, table="spin", ttl=None)
+
+
+class SpinEngine:
+    def __init__(
+        self,
+        model="text-davinci-002",
+        api_key=None,
+        api_base=None,
+        batch_size=20,
+        max_workers=4,
+        rate_limit=None,
+        tokens_per_minute=None,
+        token_budget=None,
+        max_tokens=60,
+        max_retries=5,
+        backoff=1.0,
+        cache=None,
+        prompt=SPIN_PROMPT,
+        prompt_version=PROMPT_VERSION,
+    ):
+        # Many news strings are sent as a list of prompts in one completion request (batch_size per request), and
+        # up to max_workers requests run at once under rate_limit (requests/sec) and tokens_per_minute. token_budget
+        # caps the tokens of a whole run; news that would go over it is left without spin.
+        self.model = model
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        self.api_base = api_base
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.token_limiter = RateLimiter(tokens_per_minute / 60 if tokens_per_minute else None)
+        self.token_budget = token_budget
+        self.tokens_used = 0
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = cache if cache is not None else Cache(table="spin", ttl=None)
+        self.prompt = prompt
+        self.prompt_version = prompt_version
+        self._lock = threading.Lock()
+
+    def __call__(self, news):
+        return self.spin_many([news])[0]
+
+    def cache_key(self, news):
+        # Spins from another model or prompt are never reused.
+        return hashlib.sha256(f"{self.model}\n{self.prompt_version}\n{news}".encode()).hexdigest()
+
+    def spin_many(self, news_list):
+        spins = {news: self.cache.get(self.cache_key(news)) for news in dict.fromkeys(news_list)}
+        uncached = [news for news, spin in spins.items() if spin is None]
+        batches = list(chunked(uncached, self.batch_size))
+        for batch, batch_spins in zip(batches, fetch_all(self._spin_batch, batches, self.max_workers)):
+            for news, spin in zip(batch, batch_spins):
+                spins[news] = spin
+                if spin:
+                    self.cache.put(self.cache_key(news), spin)
+
+        return [spins[news] or "" for news in news_list]
+
+    def _estimate_tokens(self, prompts):
+        # Roughly four characters per token, plus the completion itself.
+        return sum(len(prompt) // 4 + self.max_tokens for prompt in prompts)
+
+    def _spin_batch(self, batch):
+        prompts = [self.prompt.format(news=news) for news in batch]
+        estimated_tokens = self._estimate_tokens(prompts)
+        with self._lock:
+            if self.token_budget is not None and self.tokens_used + estimated_tokens > self.token_budget:
+                logger.warning(f"Spin token budget of {self.token_budget} spent; skipping {len(batch)} blurbs.")
+                metrics.increment("spin.skipped", len(batch))
+                return ["" for _ in batch]
+            self.tokens_used += estimated_tokens
+
+        self.rate_limiter.wait()
+        self.token_limiter.wait(estimated_tokens)
+        response = self._complete(prompts)
+        used_tokens = response.get("usage", dict()).get("total_tokens", estimated_tokens)
+        with self._lock:
+            self.tokens_used += used_tokens - estimated_tokens
+        metrics.increment("spin.tokens", used_tokens)
+
+        spins = ["" for _ in batch]
+        for choice in response["choices"]:
+            spins[choice["index"]] = choice["text"].strip()
+        return spins
+
+    def _complete(self, prompts):
+        import openai
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                with metrics.timer("spin.request"):
+                    response = openai.Completion.create(
+                        model=self.model,
+                        prompt=prompts,
+                        max_tokens=self.max_tokens,
+                        api_key=self.api_key,
+                        api_base=self.api_base,
+                    )
+                metrics.increment("spin.requests")
+                return response
+            except retryable_errors():
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * 2**attempt
+                logger.debug(f"Spin request failed; retrying in {delay}s.", exc_info=True)
+                metrics.increment("spin.retries")
+                time.sleep(delay)
@@ -0,0 +1,242 @@
+from operator import attrgetter
+from string import Formatter
+
+from .context import GameContext
+
+
+def stat_summary(stats, include_zeros=False):
+    summary = list()
+    for stat in stats:
+        if stat[0] == 1:
+            summary.append(f"a {stat[1]}")
+        elif stat[0] != 0 or include_zeros:
+            summary.append(f"{stat[0]} {stat[1]}s")
+
+    if not summary:
+        return ""
+    elif len(summary) == 1:
+        return summary[0]
+    else:
+        return ", ".join(summary[:-1]) + " and " + summary[-1]
+
+
+# Templates are rendered against a namespace of "player" (a record.PlayerRef), "stats" (the player's boxscore),
+# "game" (the GameContext of the boxscore), "won" (whether the player's team won) and "opponent" (the name of the other
+# team). Fields are written as in
+# str.format ("{stats.rush_attempts}", "{stats.minutes_played:.0f}") and conditions name a field that must be non-zero
+# ("stats.rush_attempts") or zero ("!stats.rush_attempts"). Everything is parsed once when the template is built.
+def _compile_field(field):
+    root, _, path = field.partition(".")
+    return root, attrgetter(path) if path else None
+
+
+def _compile_text(text):
+    parts = list()
+    for literal, field, spec, _ in Formatter().parse(text):
+        if literal:
+            parts.append(literal)
+        if field is not None:
+            parts.append(_compile_field(field) + (spec,))
+    return parts
+
+
+def _compile_conditions(conditions):
+    return [(condition.startswith("!"), _compile_field(condition.lstrip("!"))) for condition in conditions]
+
+
+def _lookup(namespace, field):
+    value = namespace[field[0]]
+    return field[1](value) if field[1] else value
+
+
+def _render_text(parts, namespace):
+    return "".join(part if isinstance(part, str) else format(_lookup(namespace, part), part[2]) for part in parts)
+
+
+class Clause:
+    def __init__(self, text, when=()):
+        self.parts = _compile_text(text)
+        self.conditions = _compile_conditions([when] if isinstance(when, str) else when)
+
+    def applies(self, namespace):
+        return all(bool(_lookup(namespace, field)) != negated for negated, field in self.conditions)
+
+    def render(self, namespace):
+        return _render_text(self.parts, namespace)
+
+
+class Summary(Clause):
+    def __init__(self, stats, prefix="", when=(), include_zeros=False):
+        # stats are (field, unit) pairs rendered with stat_summary; the clause is dropped when the summary is empty.
+        super().__init__(prefix, when)
+        self.stats = [(_compile_field(field), unit) for field, unit in stats]
+        self.include_zeros = include_zeros
+
+    def render(self, namespace):
+        summary = stat_summary([(_lookup(namespace, field), unit) for field, unit in self.stats], self.include_zeros)
+        if not summary:
+            return ""
+        prefix = _render_text(self.parts, namespace)
+        return f"{prefix} {summary}" if prefix else summary
+
+
+class Template:
+    def __init__(self, *clauses):
+        self.clauses = [Clause(clause) if isinstance(clause, str) else clause for clause in clauses]
+
+    def render(self, namespace):
+        rendered = (clause.render(namespace) for clause in self.clauses if clause.applies(namespace))
+        return " ".join(text for text in rendered if text)
+
+
+class NewsTemplates:
+    def __init__(self, positions=None, default=None):
+        # A news function (boxscore, player, player_boxscore) picking a template by the player's position. The writer
+        # passes a GameContext as the boxscore; a bare boxscore gets a context of its own.
+        self.positions = positions or dict()
+        self.default = default
+
+    def __call__(self, boxscore, player, player_boxscore):
+        game = GameContext.of(boxscore)
+        template = self.positions.get(player.position, self.default)
+        namespace = {
+            "player": player,
+            "stats": player_boxscore,
+            "game": game,
+            "won": game.won(player),
+            # Only ties name the opponent; the other results read the winning or losing name straight off the game.
+            "opponent": game.opponent_name(player) if game.tied else None,
+        }
+        return template.render(namespace)
+
+
+GAME_RESULT = (
+    Clause("in {game.weekday}'s {game.home_score}-{game.away_score}"),
+    Clause("win over the {game.losing_name}.", when="won"),
+    Clause("loss to the {game.winning_name}.", when=["!won", "!game.tied"]),
+    Clause("tie with the {opponent}.", when="game.tied"),
+)
+
+GENERIC_NEWS = NewsTemplates(
+    default=Template(
+        Clause(
+            "{player.name} played in the {game.winning_name}'s {game.winning_score} - {game.losing_score} win over the "
+            "{game.losing_name} on {game.weekday}.",
+            when="!game.tied",
+        ),
+        Clause(
+            "{player.name} played in the {game.home_score} - {game.away_score} tie with the {opponent} on "
+            "{game.weekday}.",
+            when="game.tied",
+        ),
+    )
+)
+
+NFL_PASSING_STATS = [
+    ("stats.passing_yards", "yard"),
+    ("stats.passing_touchdowns", "touchdown"),
+    ("stats.interceptions", "interception"),
+]
+NFL_RUSHING_STATS = [
+    ("stats.rush_yards", "yard"),
+    ("stats.rush_touchdowns", "touchdown"),
+    ("stats.fumbles_lost", "fumble"),
+]
+NFL_RECEIVING_STATS = [
+    ("stats.receiving_yards", "yard"),
+    ("stats.receiving_touchdowns", "touchdown"),
+    ("stats.fumbles_lost", "fumble"),
+]
+NFL_ALSO_RUSHING = (
+    Clause("while rushing {stats.rush_attempts} times for", when="stats.rush_attempts"),
+    Summary(NFL_RUSHING_STATS, when="stats.rush_attempts"),
+)
+NFL_RECEIVER = Template(
+    "{player.name} caught {stats.receptions} of {stats.times_pass_target} targets for",
+    Summary(NFL_RECEIVING_STATS),
+    *NFL_ALSO_RUSHING,
+    *GAME_RESULT,
+)
+
+NFL_NEWS = NewsTemplates(
+    {
+        "QB": Template(
+            "{player.name} completed {stats.completed_passes} of {stats.attempted_passes} pass attempts for",
+            Summary(NFL_PASSING_STATS),
+            *NFL_ALSO_RUSHING,
+            *GAME_RESULT,
+        ),
+        "RB": Template(
+            "{player.name} rushed {stats.rush_attempts} times for",
+            Summary(NFL_RUSHING_STATS),
+            Clause(
+                "while catching {stats.receptions} of {stats.times_pass_target} targets for", when="stats.receptions"
+            ),
+            Summary(NFL_RECEIVING_STATS, when="stats.receptions"),
+            *GAME_RESULT,
+        ),
+        "WR": NFL_RECEIVER,
+        "TE": NFL_RECEIVER,
+        "K": Template(
+            "{player.name}",
+            Clause(
+                "made {stats.field_goals_made} of {stats.field_goals_attempted} field goals",
+                when="stats.field_goals_attempted",
+            ),
+            Clause(
+                "while going {stats.extra_points_made} for {stats.extra_points_attempted} on PATs",
+                when=["stats.field_goals_attempted", "stats.extra_points_attempted"],
+            ),
+            Clause(
+                "went {stats.extra_points_made} for {stats.extra_points_attempted} on PATs",
+                when=["!stats.field_goals_attempted", "stats.extra_points_attempted"],
+            ),
+            Clause("did not appear", when=["!stats.field_goals_attempted", "!stats.extra_points_attempted"]),
+            *GAME_RESULT,
+        ),
+    },
+    default=Template("{player.name} played", *GAME_RESULT),
+)
+
+# MLB positions vary too much between rosters to pick a template by, so pitchers and batters are told apart by stats.
+MLB_NEWS = NewsTemplates(
+    default=Template(
+        Summary(
+            [("stats.earned_runs_allowed", "earned run"), ("stats.hits_allowed", "hit")],
+            prefix="{player.name} pitched {stats.innings_pitched} innings, allowing",
+            when="stats.innings_pitched",
+            include_zeros=True,
+        ),
+        Summary(
+            [("stats.strikeouts", "strikeout"), ("stats.bases_on_balls_given", "walk")],
+            prefix="with",
+            when="stats.innings_pitched",
+        ),
+        Clause("{player.name} went {stats.hits} for {stats.at_bats}", when="!stats.innings_pitched"),
+        Summary(
+            [("stats.runs", "run"), ("stats.bases_on_balls", "walk"), ("stats.times_struck_out", "strikeout")],
+            prefix="with",
+            when="!stats.innings_pitched",
+        ),
+        Clause("and drove in {stats.runs_batted_in}", when=["!stats.innings_pitched", "stats.runs_batted_in"]),
+        *GAME_RESULT,
+    )
+)
+
+NBA_COUNTING_STATS = [
+    ("stats.points", "point"),
+    ("stats.total_rebounds", "rebound"),
+    ("stats.assists", "assist"),
+    ("stats.steals", "steal"),
+    ("stats.blocks", "block"),
+]
+NBA_NEWS = NewsTemplates(
+    default=Template(
+        Summary(NBA_COUNTING_STATS, prefix="{player.name} had"),
+        Clause("{player.name} played", when=["!" + field for field, _ in NBA_COUNTING_STATS]),
+        Clause("in {stats.minutes_played:.0f} minutes", when="stats.minutes_played"),
+        *GAME_RESULT,
+    )
+)
+
+NEWS_TEMPLATES = {"NFL": NFL_NEWS, "MLB": MLB_NEWS, "NBA": NBA_NEWS}
@@ -1,3 +1,5 @@
+from itertools import islice
+
 from .exception import KeyNotFoundError
 
 
@@ -25,3 +27,12 @@ def get_value_from_document(key, document):
             raise KeyNotFoundError(key, document)
 
     return value
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
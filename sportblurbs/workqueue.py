@@ -0,0 +1,181 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import logging
+import os
+import socket
+import threading
+import uuid
+
+from pymongo import ReturnDocument, UpdateOne
+
+from sportblurbs import metrics
+from sportblurbs.database import BACKFILL_COLLECTION
+
+logger = logging.getLogger()
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def default_owner():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class WorkQueue:
+    def __init__(self, database, job, lease=600, max_attempts=3, owner=None, clock=datetime.utcnow):
+        # Units of a job live in the backfill collection. A worker claims a unit atomically (find_one_and_update) along
+        # with a lease of lease seconds, which it renews while it works on the unit. A unit whose lease runs out, because
+        # its worker died or lost its connection, can be claimed by any other worker on any host. Units that fail are
+        # claimable again until they have been attempted max_attempts times.
+        self.database = database
+        self.job = job
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.owner = owner or default_owner()
+        self.clock = clock
+
+    @property
+    def collection(self):
+        return self.database[BACKFILL_COLLECTION]
+
+    def unit_id(self, key):
+        return f"{self.job}|{key}"
+
+    def add(self, units, kind):
+        # units are (key, unit) pairs. Units already in the job keep their status, so adding them again is a no-op.
+        operations = [
+            UpdateOne(
+                {"_id": self.unit_id(key)},
+                {
+                    "$setOnInsert": {
+                        "job": self.job,
+                        "kind": kind,
+                        "order": order,
+                        "unit": list(unit) if isinstance(unit, tuple) else unit,
+                        "status": PENDING,
+                        "attempts": 0,
+                    }
+                },
+                upsert=True,
+            )
+            for order, (key, unit) in enumerate(units)
+        ]
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    def expire(self):
+        # A unit whose worker died on its last attempt can never be claimed again, so once its lease runs out it is
+        # failed instead of staying running forever.
+        result = self.collection.update_many(
+            {
+                "job": self.job,
+                "status": RUNNING,
+                "lease_expires": {"$lt": self.clock()},
+                "attempts": {"$gte": self.max_attempts},
+            },
+            {"$set": {"status": FAILED, "error": "lease expired on the last attempt"}, "$unset": {"lease_expires": ""}},
+        )
+        if result.modified_count:
+            logger.warning(f"{result.modified_count} units of '{self.job}' failed with their last lease expired.")
+            metrics.increment("workqueue.failed_units", result.modified_count)
+        return result.modified_count
+
+    def status(self):
+        self.expire()
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        pipeline = [{"$match": {"job": self.job}}, {"$group": {"_id": "$status", "n": {"$sum": 1}}}]
+        for row in self.collection.aggregate(pipeline):
+            counts[row["_id"]] = row["n"]
+        return counts
+
+    def claim(self):
+        self.expire()
+        now = self.clock()
+        unit_doc = self.collection.find_one_and_update(
+            {
+                "job": self.job,
+                "attempts": {"$lt": self.max_attempts},
+                "$or": [{"status": {"$in": [PENDING, FAILED]}}, {"status": RUNNING, "lease_expires": {"$lt": now}}],
+            },
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "owner": self.owner,
+                    "started": now,
+                    "lease_expires": now + timedelta(seconds=self.lease),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("order", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if unit_doc is not None:
+            metrics.increment("workqueue.claims")
+        return unit_doc
+
+    def _update_own(self, unit_doc, update):
+        # Only the current lease holder may touch a unit; False means the lease expired and the unit was reclaimed.
+        result = self.collection.update_one({"_id": unit_doc["_id"], "owner": self.owner, "status": RUNNING}, update)
+        return result.matched_count == 1
+
+    def renew(self, unit_doc):
+        return self._update_own(unit_doc, {"$set": {"lease_expires": self.clock() + timedelta(seconds=self.lease)}})
+
+    def complete(self, unit_doc):
+        completed = self._update_own(
+            unit_doc, {"$set": {"status": DONE, "finished": self.clock()}, "$unset": {"error": "", "lease_expires": ""}}
+        )
+        if not completed:
+            logger.warning(f"Lease on unit '{unit_doc['_id']}' was lost before it completed.")
+            metrics.increment("workqueue.lost_leases")
+        return completed
+
+    def fail(self, unit_doc, error):
+        return self._update_own(
+            unit_doc,
+            {
+                "$set": {"status": FAILED, "error": repr(error), "finished": self.clock()},
+                "$unset": {"lease_expires": ""},
+            },
+        )
+
+    @contextmanager
+    def holding(self, unit_doc):
+        # Renews the lease every third of its length while the body runs.
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(self.lease / 3):
+                if not self.renew(unit_doc):
+                    return
+
+        thread = threading.Thread(target=heartbeat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def work(self, func):
+        # Claims and runs units with func until none are left to claim, and returns the number completed.
+        num_units = 0
+        while True:
+            unit_doc = self.claim()
+            if unit_doc is None:
+                return num_units
+            try:
+                with self.holding(unit_doc):
+                    func(unit_doc)
+            except Exception as error:
+                logger.exception(f"Unit '{unit_doc['_id']}' failed (attempt {unit_doc['attempts']}).")
+                metrics.increment("workqueue.failed_units")
+                self.fail(unit_doc, error)
+                continue
+            if self.complete(unit_doc):
+                metrics.increment("workqueue.units")
+                num_units += 1
+                logger.info(f"Unit '{unit_doc['_id']}' done.")
@@ -1,147 +1,87 @@
-from dateutil import parser
 import logging
-import openai
 
-from .utils import game_score, player_is_home
+from . import metrics
+from .context import GameContext
+from .filter import filter_player_boxscores, is_frame_filter
+from .record import BlurbRecord
+from .template import GENERIC_NEWS, NFL_NEWS
 
 logger = logging.getLogger()
 
 
 def write_generic_player_news(boxscore, player, player_boxscore):
-    day_of_week = parser.parse(boxscore.date).strftime("%A")
-    away_score, home_score = game_score(boxscore)
-    return (
-        f"{player.name} played in the {boxscore.winning_name}'s {home_score} - {away_score} win over the "
-        f"{boxscore.losing_name} on {day_of_week}."
-    )
-
-
-def _stat_summary(stats, include_zeros=False):
-    summary = list()
-    for stat in stats:
-        if stat[0] == 1:
-            summary.append(f"a {stat[1]}")
-        elif stat[0] != 0 or include_zeros:
-            summary.append(f"{stat[0]} {stat[1]}s")
-
-    if not summary:
-        return ""
-    elif len(summary) == 1:
-        return summary[0]
-    else:
-        return ", ".join(summary[:-1]) + " and " + summary[-1]
-
-
-def _nfl_passing_stat_summary(player_boxscore, include_zeros=False):
-    return _stat_summary(
-        [
-            (player_boxscore.passing_yards, "yard"),
-            (player_boxscore.passing_touchdowns, "touchdown"),
-            (player_boxscore.interceptions, "interception"),
-        ],
-        include_zeros=include_zeros,
-    )
-
-
-def _nfl_rushing_stat_summary(player_boxscore, include_zeros=False):
-    return _stat_summary(
-        [
-            (player_boxscore.rush_yards, "yard"),
-            (player_boxscore.rush_touchdowns, "touchdown"),
-            (player_boxscore.fumbles_lost, "fumble"),
-        ],
-        include_zeros=include_zeros,
-    )
-
-
-def _nfl_receiving_stat_summary(player_boxscore, include_zeros=False):
-    return _stat_summary(
-        [
-            (player_boxscore.receiving_yards, "yard"),
-            (player_boxscore.recieving_touchdowns, "touchdown"),
-            (player_boxscore.fumbles_lost, "fumble"),
-        ],
-        include_zeros=include_zeros,
-    )
+    return GENERIC_NEWS(boxscore, player, player_boxscore)
 
 
 def write_nfl_player_news(boxscore, player, player_boxscore):
-    day_of_week = parser.parse(boxscore.date).strftime("%A")
-    away_score, home_score = game_score(boxscore)
-    news = list()
-    if player.position == "QB":
-        news.append(
-            f"{player.name} completed {player_boxscore.completed_passes} of {player_boxscore.attempted_passes} pass "
-            f"attempts for"
-        )
-        news.append(_nfl_passing_stat_summary(player_boxscore))
-        if player_boxscore.rush_attempts > 0:
-            news.append(f"while rushing {player_boxscore.rush_attempts} times for")
-            news.append(_nfl_rushing_stat_summary(player_boxscore))
-    elif player.position == "RB":
-        news.append(f"{player.name} rushed {player_boxscore.rush_attempts} times for")
-        news.append(_nfl_rushing_stat_summary(player_boxscore))
-        if player_boxscore.receptions > 0:
-            news.append(f"while catching {player_boxscore.receptions} of {player_boxscore.targets} targets for")
-            news.append(_nfl_receiving_stat_summary(player_boxscore))
-    elif player.position in ["WR", "TE"]:
-        news.append(f"{player.name} caught {player_boxscore.receptions} of {player_boxscore.targets} targets for")
-        news.append(_nfl_receiving_stat_summary(player_boxscore))
-        if player_boxscore.rush_attempts > 0:
-            news.append(f"while rushing {player_boxscore.rush_attempts} times for")
-            news.append(_nfl_rushing_stat_summary(player_boxscore))
-    elif player.position == "K":
-        news.append(f"{player.name}")
-        if player_boxscore.field_goals_attempted > 0:
-            news.append(
-                f"made {player_boxscore.field_goals_made} of {player_boxscore.field_goals_attempted} field goals"
-            )
-            if player_boxscore.extra_points_attempted > 0:
-                news.append(
-                    f"while going {player_boxscore.extra_points_made} for {player_boxscore.extra_points_attempted} on "
-                    f"PATs"
-                )
-        elif player_boxscore.extra_points_attempted > 0:
-            news.append(
-                f"went {player_boxscore.extra_points_made} for {player_boxscore.extra_points_attempted} on PATs"
-            )
-        else:
-            news.append("did not appear")
-    else:
-        news.append(f"{player.name} played")
-
-    news.append(f"in {day_of_week}'s {away_score}-{home_score}")
-    is_home = player_is_home(player, boxscore)
-    if (is_home and home_score > away_score) or (not is_home and home_score < away_score):
-        news.append(f"win over the {boxscore.losing_name}.")
-    else:
-        news.append(f"loss to the {boxscore.winning_name}.")
-
-    return " ".join(news)
+    return NFL_NEWS(boxscore, player, player_boxscore)
 
 
 def write_null_spin(news):
     return ""
 
 
+def write_spins(spin_func, news_list):
+    # Spin functions that can work on many news strings at once (e.g. spin.SpinEngine) expose spin_many.
+    spin_many = getattr(spin_func, "spin_many", None)
+    if spin_many:
+        return spin_many(news_list)
+    return [spin_func(news) for news in news_list]
+
+
 def write_player_blurbs_from_boxscore(
     boxscore,
     league,
     news_func=write_generic_player_news,
     spin_func=write_null_spin,
     filters=None,
+):
+    return write_player_blurbs_from_boxscores([boxscore], league, news_func, spin_func, filters)
+
+
+def write_player_blurbs_from_boxscores(
+    boxscores,
+    league,
+    news_func=write_generic_player_news,
+    spin_func=write_null_spin,
+    filters=None,
 ):
     if callable(filters):
         filters = [filters]
+    # Frame filters (see filter.uses_columns) only need the player boxscores' stats, so they run over the whole batch
+    # at once and players they drop are never fetched. The rest of the filters run per player.
+    frame_filters = [func for func in filters or list() if is_frame_filter(func)]
+    filters = [func for func in filters or list() if not is_frame_filter(func)]
+    pairs = [
+        (boxscore, player_boxscore)
+        for boxscore in map(GameContext.of, boxscores)
+        for player_boxscore in boxscore.home_players + boxscore.away_players
+    ]
+    if frame_filters:
+        with metrics.timer("stage.frame_filter"):
+            num_pairs = len(pairs)
+            pairs = filter_player_boxscores(pairs, frame_filters)
+        metrics.increment("players.filtered_out", num_pairs - len(pairs))
+    # Resolve every player left in the batch up front (deduplicated and concurrently) before any filter or news runs.
+    with metrics.timer("stage.resolve_players"):
+        players = league.get_players([player_boxscore.player_id for _, player_boxscore in pairs])
     blurbs = list()
-    for player_boxscore in boxscore.home_players + boxscore.away_players:
-        player = league.get_player(player_boxscore.player_id)
-        if filters and not all(func(boxscore, player, player_boxscore) for func in filters):
+    for boxscore, player_boxscore in pairs:
+        player = players[player_boxscore.player_id]
+        with metrics.timer("stage.filter"):
+            filtered_out = filters and not all(func(boxscore, player, player_boxscore) for func in filters)
+        if filtered_out:
             logging.debug(f"filtering out {player.name}")
+            metrics.increment("players.filtered_out")
             continue
         logging.debug(f"writing blurb for {player.name}")
-        news = news_func(boxscore, player, player_boxscore)
-        spin = spin_func(news)
-        blurbs.append({"player": player, "news": news, "spin": spin})
+        with metrics.timer("stage.news"):
+            news = news_func(boxscore, player, player_boxscore)
+        blurbs.append(BlurbRecord(player, news, None, boxscore._uri))
+    with metrics.timer("stage.spin"):
+        spins = write_spins(spin_func, [blurb.news for blurb in blurbs])
+    for blurb, spin in zip(blurbs, spins):
+        blurb.spin = spin
+    metrics.increment("blurbs.written", len(blurbs))
 
     return blurbs
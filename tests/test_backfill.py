@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+import pytest
+from unittest import mock
+
+from sportblurbs.backfill import backfill_job, backfill_units, Backfill
+from sportblurbs.database import BACKFILL_COLLECTION
+from sportblurbs.league import League, nfl
+from sportblurbs.workqueue import DONE, FAILED, PENDING, RUNNING
+
+mongomock = pytest.importorskip("mongomock")
+
+start_date = datetime(2021, 6, 1)
+end_date = datetime(2021, 6, 3)
+
+
+@pytest.fixture
+def league():
+    league = League("SLN", mock.MagicMock(), season_start=(6, 1))
+    league.iter_boxscores = mock.Mock(side_effect=lambda dates: iter([f"boxscore-{dates[0]:%d}"]))
+    return league
+
+
+@pytest.fixture
+def database():
+    return mongomock.MongoClient()["sportblurbs-test"]
+
+
+def test_backfill_units_are_dates_or_nfl_weeks(league):
+    assert backfill_units(league, start_date, end_date) == [datetime(2021, 6, d) for d in range(1, 4)]
+    assert backfill_units(nfl, datetime(2021, 9, 7), datetime(2021, 9, 21)) == [(2021, 1), (2021, 2), (2021, 3)]
+
+
+def test_plan_is_idempotent(league, database):
+    backfill = Backfill(league, backfill_job(league, start_date, end_date), database)
+    assert backfill.plan(start_date, end_date) == 3
+    database[BACKFILL_COLLECTION].update_one({"order": 0}, {"$set": {"status": DONE}})
+    backfill.plan(start_date, end_date)
+    assert backfill.status() == {PENDING: 2, RUNNING: 0, DONE: 1, FAILED: 0}
+
+
+@mock.patch("sportblurbs.backfill.process_boxscores")
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_run_processes_every_unit(process_boxscores, league, database, max_workers):
+    backfill = Backfill(league, "job", database, max_workers=max_workers)
+    backfill.plan(start_date, end_date)
+    assert backfill.run() == {PENDING: 0, RUNNING: 0, DONE: 3, FAILED: 0}
+    assert sorted(call[0][0][0] for call in process_boxscores.call_args_list) == [
+        "boxscore-01",
+        "boxscore-02",
+        "boxscore-03",
+    ]
+
+
+@mock.patch("sportblurbs.backfill.process_boxscores")
+def test_run_resumes_from_failed_and_interrupted_units(process_boxscores, league, database):
+    process_boxscores.side_effect = lambda boxscores, *args: boxscores == ["boxscore-02"] and 1 / 0
+    backfill = Backfill(league, "job", database, max_attempts=1)
+    backfill.plan(start_date, end_date)
+    assert backfill.run() == {PENDING: 0, RUNNING: 0, DONE: 2, FAILED: 1}
+    assert "ZeroDivisionError" in database[BACKFILL_COLLECTION].find_one({"status": FAILED})["error"]
+
+    # A unit whose lease ran out (its worker was killed) is started over along with the failed one.
+    database[BACKFILL_COLLECTION].update_one(
+        {"order": 2}, {"$set": {"status": RUNNING, "lease_expires": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+    process_boxscores.reset_mock(side_effect=True)
+    backfill = Backfill(league, "job", database, max_attempts=2)
+    assert backfill.run() == {PENDING: 0, RUNNING: 0, DONE: 3, FAILED: 0}
+    assert [call[0][0] for call in process_boxscores.call_args_list] == [["boxscore-02"], ["boxscore-03"]]
+
+
+@mock.patch("sportblurbs.backfill.process_boxscores")
+def test_plan_with_games_makes_every_game_a_unit(process_boxscores, league, database):
+    league.get_games_for_dates = mock.Mock(return_value=[{"boxscore": "a"}, {"boxscore": "b"}])
+    league.get_boxscores_for_uris = mock.Mock(side_effect=lambda uris: [f"boxscore-{uri}" for uri in uris])
+    backfill = Backfill(league, "job", database)
+    assert backfill.plan(start_date, end_date, games=True) == 2
+    backfill.run()
+    assert [call[0][0] for call in process_boxscores.call_args_list] == [["boxscore-a"], ["boxscore-b"]]
@@ -0,0 +1,54 @@
+import pytest
+from unittest import mock
+
+from sportblurbs.cache import Cache, PlayerCache
+
+key = ("SLN", "TestPlayerId", "2021")
+value = {"name": "Pablo Sanchez"}
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache.sqlite")
+
+
+def test_get_counts_hits_and_misses():
+    cache = Cache()
+    assert cache.get(key) is None
+    cache.put(key, value)
+    assert cache.get(key) == value
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = Cache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_disk_tier_survives_a_new_cache(cache_path):
+    PlayerCache(cache_path).put(key, value)
+    cache = PlayerCache(cache_path)
+    assert cache.get(key) == value
+    assert cache.hits == 1
+
+
+def test_expired_entries_are_evicted(cache_path):
+    cache = PlayerCache(cache_path, ttl=60)
+    with mock.patch("sportblurbs.cache.time.time", return_value=0):
+        cache.put(key, value)
+    with mock.patch("sportblurbs.cache.time.time", return_value=61):
+        assert cache.get(key) is None
+    assert PlayerCache(cache_path, ttl=None).get(key) is None
+
+
+def test_unpicklable_values_are_kept_in_memory(cache_path):
+    cache = PlayerCache(cache_path)
+    cache.put(key, lambda: None)
+    assert cache.get(key) is not None
+    assert PlayerCache(cache_path).get(key) is None
@@ -0,0 +1,109 @@
+import importlib
+
+import pytest
+from pyquery import PyQuery
+from types import SimpleNamespace
+from unittest import mock
+
+from sportblurbs.context import GameContext
+from sportblurbs.database import create_game_document
+
+
+@pytest.fixture
+def boxscore():
+    bs = mock.Mock()
+    bs._uri = "200806150MEL"
+    bs.date = "06/15/2008"
+    bs._home_name.text.return_value = "Melonheads"
+    bs.home_points = 4
+    bs.away_points = 7
+    bs.winning_name = "Wombats"
+    bs.winning_abbr = "wom"
+    bs.losing_name = "Melonheads"
+    bs.losing_abbr = "mel"
+    return bs
+
+
+def test_game_context_holds_game_level_facts(boxscore):
+    context = GameContext(boxscore)
+    assert (context.home_score, context.away_score) == (4, 7)
+    assert (context.winning_score, context.losing_score) == (7, 4)
+    assert context.home_won is False
+    assert (context.home_abbr, context.away_abbr) == ("MEL", "WOM")
+    assert context.weekday == "Sunday"
+    assert context.complete
+
+
+def test_game_context_reads_other_attributes_from_the_boxscore(boxscore):
+    context = GameContext(boxscore)
+    assert context._uri == boxscore._uri
+    assert context.winning_name == "Wombats"
+    assert GameContext.of(context) is context
+
+
+def test_game_context_parses_the_date_once(boxscore):
+    context = GameContext(boxscore)
+    with mock.patch("sportblurbs.context.parser.parse", wraps=lambda date: mock.Mock()) as parse:
+        for _ in range(3):
+            context.weekday
+        parse.assert_called_once_with("06/15/2008")
+
+
+def test_game_context_falls_back_to_runs():
+    boxscore = SimpleNamespace(home_runs=None, away_runs=None)
+    context = GameContext(boxscore)
+    assert not context.complete
+    assert (context.winning_score, context.losing_score, context.home_won) == (None, None, None)
+    assert (context.home_abbr, context.away_abbr) == (None, None)
+
+
+@pytest.mark.parametrize("team_abbreviation, is_home, won", [("mel", True, False), ("WOM", False, True)])
+def test_game_context_tells_a_players_side_and_result(boxscore, team_abbreviation, is_home, won):
+    context = GameContext(boxscore)
+    player = SimpleNamespace(team_abbreviation=team_abbreviation)
+    assert context.is_home(player) == is_home
+    assert context.won(player) == won
+
+
+def test_game_context_has_no_winner_in_a_tie(boxscore):
+    boxscore.home_points = 7
+    context = GameContext(boxscore)
+    assert context.tied
+    assert context.home_won is None
+    assert (context.winning_score, context.losing_score) == (7, 7)
+    for team_abbreviation in ["mel", "wom"]:
+        assert not context.won(SimpleNamespace(team_abbreviation=team_abbreviation))
+
+
+def test_create_game_document_from_a_game_context(boxscore):
+    league = mock.Mock()
+    league.name = "SLN"
+    game_doc = create_game_document(GameContext(boxscore), league)
+    assert game_doc["game"]["id"] == "200806150MEL"
+    assert [(team["abbreviation"], team["score"], team["is_home"]) for team in game_doc["game"]["teams"]] == [
+        ("WOM", 7, False),
+        ("MEL", 4, True),
+    ]
+    assert game_doc["complete"]
+
+
+def _sportsipy_boxscore(league, home, away, home_score, away_score):
+    # A real sportsipy Boxscore of the league, with the parsed fields GameContext reads set instead of fetched.
+    boxscore_module = importlib.import_module(f"sportsipy.{league}.boxscore")
+    with mock.patch.object(boxscore_module.Boxscore, "_parse_game_data"):
+        boxscore = boxscore_module.Boxscore(f"202110100{home}")
+    score = "runs" if league == "mlb" else "points"
+    setattr(boxscore, f"_home_{score}", home_score)
+    setattr(boxscore, f"_away_{score}", away_score)
+    boxscore._home_name = PyQuery(f'<div><a href="/teams/{home}/2021.html">{home}</a></div>')
+    boxscore._away_name = PyQuery(f'<div><a href="/teams/{away}/2021.html">{away}</a></div>')
+    return boxscore
+
+
+@pytest.mark.parametrize("league", ["mlb", "nba", "nfl"])
+@pytest.mark.parametrize("home_score, away_score", [(5, 3), (3, 5), (4, 4)])
+def test_game_context_of_a_sportsipy_boxscore_knows_the_home_team(league, home_score, away_score):
+    context = GameContext(_sportsipy_boxscore(league, "mel", "wom", home_score, away_score))
+    assert (context.home_abbr, context.away_abbr) == ("MEL", "WOM")
+    assert context.is_home(SimpleNamespace(team_abbreviation="mel"))
+    assert context.won(SimpleNamespace(team_abbreviation="mel")) == (home_score > away_score)
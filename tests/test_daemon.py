@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import pytest
+from unittest import mock
+
+from sportblurbs.daemon import Daemon, game_date, PollSchedule
+from sportblurbs.league import NflLeague
+
+evening = datetime(2021, 10, 10, 23)
+morning = datetime(2021, 10, 11, 12)
+
+
+def _games(num_complete, num_pending, date="20211010"):
+    return [{"boxscore": f"{date}0c{g}", "home_score": 3} for g in range(num_complete)] + [
+        {"boxscore": f"{date}0p{g}", "home_score": None} for g in range(num_pending)
+    ]
+
+
+@pytest.fixture
+def schedule():
+    return PollSchedule(live_interval=60, idle_interval=600, backoff=2, start_hour=16, live_hours=16)
+
+
+def test_schedule_backs_off_while_nothing_completes(schedule):
+    delays = [schedule.next_delay(_games(1, 5), evening) for _ in range(6)]
+    assert delays == [120, 240, 480, 600, 600, 600]
+
+
+def test_schedule_polls_frequently_after_a_game_completes(schedule):
+    schedule.next_delay(_games(1, 5), evening)
+    schedule.next_delay(_games(1, 5), evening)
+    assert schedule.next_delay(_games(2, 4), evening) == 60
+
+
+@pytest.mark.parametrize(
+    "games,now,expected_delay",
+    [
+        (_games(5, 0), evening, 17 * 60 * 60),
+        (list(), evening, 17 * 60 * 60),
+        (_games(0, 5), morning, 4 * 60 * 60),
+    ],
+)
+def test_schedule_sleeps_until_the_next_day_when_no_games_are_live(schedule, games, now, expected_delay):
+    assert schedule.next_delay(games, now) == expected_delay
+
+
+def test_schedule_sleeps_until_the_next_pending_game_is_expected(schedule):
+    games = _games(0, 2, date="20211014") + _games(0, 14, date="20211017")
+    assert schedule.next_delay(games, datetime(2021, 10, 12, 4)) == (2 * 24 + 12) * 60 * 60
+
+
+@pytest.mark.parametrize("uri", ["202110100kan", "202110100MIL", "BOS/BOS202110100"])
+def test_game_date_is_read_from_the_boxscore_uri(uri):
+    assert game_date({"boxscore": uri}) == datetime(2021, 10, 10)
+
+
+@pytest.mark.parametrize(
+    "now,expected_dates",
+    [
+        (datetime(2021, 10, 12, 3), [(2021, 5), (2021, 6)]),
+        (datetime(2021, 9, 8), [(2021, 1)]),
+        (datetime(2022, 1, 18, 3), [(2021, 19), (2021, 20)]),
+        (datetime(2022, 2, 15), [(2021, 22)]),
+        (datetime(2022, 3, 1), list()),
+    ],
+)
+def test_daemon_polls_the_current_and_previous_nfl_weeks(now, expected_dates):
+    daemon = Daemon(NflLeague("NFL", mock.MagicMock(), season_start=(8, 1)), database=mock.MagicMock())
+    assert daemon.poll_dates(now) == expected_dates
+
+
+def test_daemon_polls_yesterday_and_today():
+    daemon = Daemon(mock.Mock(), database=mock.MagicMock())
+    assert daemon.poll_dates(evening) == [evening - timedelta(days=1), evening]
+
+
+def test_daemon_poll_only_processes_newly_completed_games():
+    league = mock.Mock()
+    league.get_games_for_dates.return_value = _games(2, 1)
+    league.get_boxscores_for_uris.side_effect = lambda uris: [f"boxscore-{uri}" for uri in uris]
+    daemon = Daemon(league, database=mock.MagicMock(), clock=lambda: evening)
+    with mock.patch("sportblurbs.daemon.get_uris_to_process", return_value=["c1"]), mock.patch(
+        "sportblurbs.daemon.process_boxscores"
+    ) as process_boxscores:
+        delay = daemon.poll()
+    assert process_boxscores.call_args[0][0] == ["boxscore-c1"]
+    assert delay == daemon.schedule.live_interval * daemon.schedule.backoff
+
+
+def test_daemon_run_survives_failed_polls():
+    daemon = Daemon(mock.Mock(), database=mock.MagicMock(), clock=lambda: evening)
+    daemon.poll = mock.Mock(side_effect=[RuntimeError(), 0])
+    with mock.patch("sportblurbs.daemon.ensure_indexes"), mock.patch.object(daemon._stop, "wait") as wait:
+        daemon.run(max_polls=2)
+    assert daemon.poll.call_count == 2
+    wait.assert_called_once_with(daemon.schedule.idle_interval)
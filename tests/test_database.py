@@ -1,18 +1,35 @@
 import copy
 
 import pytest
+from bson import SON
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
 from unittest import mock
 
 from sportblurbs.database import (
+    close_clients,
+    ensure_indexes,
     create_blurb_documents,
     create_game_documents,
+    get_client,
+    get_database,
     get_document,
+    get_documents_by_key,
+    get_query_plan,
+    put_blurb_documents,
     update_documents,
+    BulkUpdateResult,
+    BACKFILL_COLLECTION,
     BLURB_COLLECTION,
+    BLURB_KEY,
+    DUPLICATE_KEY_ERROR,
     GAME_COLLECTION,
+    GAME_ID_KEY,
+    GAME_PROJECTION,
+    INDEXES,
     SPORTBLURBS_DB,
 )
-from sportblurbs.exception import MultipleDocumentsError
+from sportblurbs.exception import MultipleDocumentsError, UpsertConflictError
 from sportblurbs.league import League
 from sportblurbs.utils import get_value_from_document
 
@@ -64,7 +81,13 @@ def sportblurbs_database(game_collection, blurb_collection):
     mock_blurb_collection = mock.Mock()
     mock_blurb_collection.find.return_value = blurb_collection
     mock_blurb_collection.count_documents.return_value = len(blurb_collection)
-    mock_sportblurbs_database_dict = {GAME_COLLECTION: mock_game_collection, BLURB_COLLECTION: mock_blurb_collection}
+    for mock_collection in [mock_game_collection, mock_blurb_collection]:
+        mock_collection.bulk_write.return_value = mock.Mock(matched_count=1, upserted_count=1, modified_count=1)
+    mock_sportblurbs_database_dict = {
+        GAME_COLLECTION: mock_game_collection,
+        BLURB_COLLECTION: mock_blurb_collection,
+        BACKFILL_COLLECTION: mock.Mock(),
+    }
     mock_sportblurbs_database = mock.MagicMock()
     mock_sportblurbs_database.__getitem__.side_effect = mock_sportblurbs_database_dict.__getitem__
     mock_sportblurbs_database.name = SPORTBLURBS_DB
@@ -96,23 +119,156 @@ def test_get_document_returns_matching_document(sportblurbs_database, collection
 def test_update_documents_raises_multiple_documents_error_when_key_is_not_unique(sportblurbs_database, collection_name):
     documents = copy.deepcopy(sportblurbs_database[collection_name].find())
     non_unique_key = list(documents[0])[0]
-    sportblurbs_database[collection_name].count_documents.return_value = 2
+    sportblurbs_database[collection_name].bulk_write.side_effect = BulkWriteError(
+        {"writeErrors": [{"code": DUPLICATE_KEY_ERROR, "op": {"q": {non_unique_key: "value"}}}]}
+    )
     with pytest.raises(MultipleDocumentsError, match=non_unique_key):
         update_documents(sportblurbs_database, collection_name, documents, non_unique_key)
 
 
+def test_update_documents_retries_upserts_that_raced_on_their_key(sportblurbs_database):
+    documents = [{"game": {"id": f"game-{i}"}} for i in range(3)]
+    sportblurbs_database[GAME_COLLECTION].bulk_write.side_effect = [
+        BulkWriteError(
+            {
+                "writeErrors": [{"index": 1, "code": DUPLICATE_KEY_ERROR, "op": {"q": {GAME_ID_KEY: "game-1"}}}],
+                "nUpserted": 2,
+            }
+        ),
+        mock.Mock(matched_count=1, upserted_count=0, modified_count=1),
+    ]
+    result = update_documents(sportblurbs_database, GAME_COLLECTION, documents, GAME_ID_KEY, upsert=True)
+    assert result == BulkUpdateResult(matched=1, upserted=2, modified=1)
+    retried = sportblurbs_database[GAME_COLLECTION].bulk_write.call_args[0][0]
+    assert retried == [ReplaceOne({GAME_ID_KEY: "game-1"}, documents[1], upsert=True)]
+
+
+def test_update_documents_raises_upsert_conflict_error_when_a_race_persists(sportblurbs_database):
+    sportblurbs_database[GAME_COLLECTION].bulk_write.side_effect = BulkWriteError(
+        {"writeErrors": [{"index": 0, "code": DUPLICATE_KEY_ERROR, "op": {"q": {GAME_ID_KEY: "game-0"}}}]}
+    )
+    with pytest.raises(UpsertConflictError, match="game-0"):
+        update_documents(sportblurbs_database, GAME_COLLECTION, [{"game": {"id": "game-0"}}], GAME_ID_KEY, upsert=True)
+    assert sportblurbs_database[GAME_COLLECTION].bulk_write.call_count == 2
+
+
 @pytest.mark.parametrize("collection_name", [GAME_COLLECTION, BLURB_COLLECTION])
 def test_update_documents_updates_documents(sportblurbs_database, collection_name):
     documents = copy.deepcopy(sportblurbs_database[collection_name].find())
     unique_key = list(documents[0])[0]
-    sportblurbs_database[collection_name].count_documents.return_value = 1
-    update_documents(sportblurbs_database, collection_name, documents, unique_key)
-    update_calls = list()
-    for call_args in sportblurbs_database[collection_name].update_one.call_args_list:
-        filter = call_args[0][0]
-        document = call_args[0][1]
-        update_calls.append((filter, document))
+    result = update_documents(sportblurbs_database, collection_name, documents, unique_key, batch_size=2)
+    operations = list()
+    for call_args in sportblurbs_database[collection_name].bulk_write.call_args_list:
+        assert call_args[1]["ordered"] is False
+        operations.extend(call_args[0][0])
 
+    assert sportblurbs_database[collection_name].bulk_write.call_count == 3
+    assert result == BulkUpdateResult(matched=3, upserted=3, modified=3)
     for document in documents:
         filter = {unique_key: get_value_from_document(unique_key, document)}
-        assert (filter, document) in update_calls
+        assert ReplaceOne(filter, document) in operations
+
+
+def test_update_documents_uses_update_operators_when_given(sportblurbs_database):
+    document = {"$set": {"game": {"id": "game-0"}, "processed": True}}
+    update_documents(sportblurbs_database, GAME_COLLECTION, [document], GAME_ID_KEY, upsert=True)
+    operations = sportblurbs_database[GAME_COLLECTION].bulk_write.call_args[0][0]
+    assert operations == [UpdateOne({GAME_ID_KEY: "game-0"}, document, upsert=True)]
+
+
+def test_blurb_documents_are_keyed_by_game_player_and_source(blurbs, blurb_collection):
+    for blurb, blurb_document in zip(blurbs, blurb_collection):
+        assert blurb_document[BLURB_KEY] == f"{blurb.game_id}|{blurb.player.player_id}|{blurb_source}"
+        assert blurb_document["game"]["id"] == blurb.game_id
+
+
+def test_put_blurb_documents_only_inserts_blurbs_with_new_keys(sportblurbs_database, blurb_collection):
+    session = mock.Mock()
+    put_blurb_documents(sportblurbs_database, blurb_collection, session=session)
+    call_args = sportblurbs_database[BLURB_COLLECTION].bulk_write.call_args
+    assert call_args[0][0] == [
+        UpdateOne({BLURB_KEY: blurb_document[BLURB_KEY]}, {"$setOnInsert": blurb_document}, upsert=True)
+        for blurb_document in blurb_collection
+    ]
+    assert call_args[1] == {"ordered": False, "session": session}
+
+
+def test_get_documents_by_key_batches_in_queries_and_maps_documents(sportblurbs_database):
+    documents = [{"game": {"id": f"game-{i}"}} for i in range(5)]
+    values = [get_value_from_document(GAME_ID_KEY, document) for document in documents]
+    sportblurbs_database[GAME_COLLECTION].find.side_effect = lambda filter, projection: [
+        document for document in documents if document["game"]["id"] in filter[GAME_ID_KEY]["$in"]
+    ]
+    found = get_documents_by_key(
+        sportblurbs_database, GAME_COLLECTION, GAME_ID_KEY, values + values[:2], GAME_PROJECTION, batch_size=2
+    )
+    assert found == dict(zip(values, documents))
+    assert sportblurbs_database[GAME_COLLECTION].find.call_count == 3
+
+
+def test_get_documents_by_key_raises_error_when_key_is_not_unique(sportblurbs_database):
+    document = {"game": {"id": "game-0"}}
+    sportblurbs_database[GAME_COLLECTION].find.return_value = [document, document]
+    with pytest.raises(MultipleDocumentsError, match="game-0"):
+        get_documents_by_key(sportblurbs_database, GAME_COLLECTION, GAME_ID_KEY, ["game-0"])
+
+
+def test_get_client_shares_one_client_per_connection_string_and_options():
+    with mock.patch("sportblurbs.database.MongoClient") as mongo_client:
+        mongo_client.side_effect = lambda *args, **kwargs: mock.MagicMock()
+        client = get_client("mongodb://host-a:27017/")
+        assert get_client("mongodb://host-a:27017/") is client
+        assert get_database(database_name, "mongodb://host-a:27017/") is client[database_name]
+        assert get_client("mongodb://host-b:27017/") is not client
+        assert get_client("mongodb://host-a:27017/", maxPoolSize=5) is not client
+        assert mongo_client.call_args[1]["maxPoolSize"] == 5
+        close_clients()
+    client.close.assert_called_once()
+    assert get_client("mongodb://host-a:27017/") is not client
+    close_clients()
+
+
+def test_ensure_indexes_creates_indexes_for_every_collection(sportblurbs_database):
+    ensure_indexes(sportblurbs_database)
+    for collection_name, indexes in INDEXES.items():
+        models = sportblurbs_database[collection_name].create_indexes.call_args[0][0]
+        assert [model.document["key"] for model in models] == [SON(keys) for keys, _ in indexes]
+    game_id_index = sportblurbs_database[GAME_COLLECTION].create_indexes.call_args[0][0][0]
+    assert game_id_index.document["unique"] is True
+    blurb_key_index = sportblurbs_database[BLURB_COLLECTION].create_indexes.call_args[0][0][0]
+    assert blurb_key_index.document["unique"] is True
+
+
+def test_get_query_plan_summarizes_winning_plan_stages(sportblurbs_database):
+    cursor = mock.Mock()
+    cursor.explain.return_value = {
+        "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "game.id_1"}}}
+    }
+    sportblurbs_database[GAME_COLLECTION].find.return_value = cursor
+    assert get_query_plan(sportblurbs_database, GAME_COLLECTION, {GAME_ID_KEY: ""}) == "FETCH <- IXSCAN(game.id_1)"
+
+
+def test_get_query_plan_reads_slot_based_plans_with_several_inputs(sportblurbs_database):
+    cursor = mock.Mock()
+    cursor.explain.return_value = {
+        "queryPlanner": {
+            "winningPlan": {
+                "queryPlan": {
+                    "stage": "FETCH",
+                    "inputStage": {
+                        "stage": "OR",
+                        "inputStages": [
+                            {"stage": "IXSCAN", "indexName": "game.id_1"},
+                            {"stage": "IXSCAN", "indexName": "complete_1_processed_1"},
+                        ],
+                    },
+                },
+                "slotBasedPlan": {"stages": "..."},
+            }
+        }
+    }
+    sportblurbs_database[GAME_COLLECTION].find.return_value = cursor
+    assert (
+        get_query_plan(sportblurbs_database, GAME_COLLECTION, {"$or": [{GAME_ID_KEY: ""}, {"complete": True}]})
+        == "FETCH <- OR <- [IXSCAN(game.id_1), IXSCAN(complete_1_processed_1)]"
+    )
@@ -0,0 +1,40 @@
+import random
+import time
+
+import pytest
+from unittest import mock
+
+from sportblurbs.fetch import RateLimiter, fetch_all
+
+
+def _slow_identity(item):
+    time.sleep(random.uniform(0, 0.01))
+    return item
+
+
+@pytest.mark.parametrize("max_workers", [None, 1, 4, 16])
+def test_fetch_all_returns_results_in_item_order(max_workers):
+    items = list(range(20))
+    assert fetch_all(_slow_identity, items, max_workers) == items
+
+
+def test_fetch_all_waits_on_rate_limiter_for_every_item():
+    rate_limiter = mock.Mock()
+    fetch_all(_slow_identity, range(5), max_workers=3, rate_limiter=rate_limiter)
+    assert rate_limiter.wait.call_count == 5
+
+
+def test_rate_limiter_spaces_calls():
+    rate_limiter = RateLimiter(rate=100)
+    start = time.monotonic()
+    for _ in range(5):
+        rate_limiter.wait()
+    assert time.monotonic() - start >= 4 * rate_limiter.interval
+
+
+def test_rate_limiter_without_rate_does_not_wait():
+    rate_limiter = RateLimiter()
+    with mock.patch("sportblurbs.fetch.time.sleep") as sleep:
+        for _ in range(5):
+            rate_limiter.wait()
+    sleep.assert_not_called()
@@ -0,0 +1,85 @@
+import pytest
+from types import SimpleNamespace
+from unittest import mock
+
+from sportblurbs.filter import (
+    filter_mlb_at_least_one_ab_or_ip,
+    filter_nba_at_least_one_minute_played,
+    filter_nfl_at_least_one_att,
+    filter_player_boxscores,
+    frame_filter_mlb_at_least_one_ab_or_ip,
+    frame_filter_nba_at_least_one_minute_played,
+    frame_filter_nfl_at_least_one_att,
+    player_stat_frame,
+)
+
+
+class UnreadablePlayerBoxscore:
+    name = "Unreadable"
+
+    def __getattr__(self, name):
+        raise TypeError(name)
+
+
+@pytest.mark.parametrize(
+    "frame_filter, row_filter, player_boxscores",
+    [
+        (
+            frame_filter_nfl_at_least_one_att,
+            filter_nfl_at_least_one_att,
+            [
+                SimpleNamespace(name="QB", attempted_passes=30, rush_attempts=2, receptions=0, field_goals_attempted=0),
+                SimpleNamespace(name="K", attempted_passes=0, rush_attempts=0, receptions=0, field_goals_attempted=3),
+                SimpleNamespace(name="OL", attempted_passes=0, rush_attempts=0, receptions=0, field_goals_attempted=0),
+                SimpleNamespace(
+                    name="DNP", attempted_passes=None, rush_attempts=None, receptions=None, field_goals_attempted=None
+                ),
+            ],
+        ),
+        (
+            frame_filter_nba_at_least_one_minute_played,
+            filter_nba_at_least_one_minute_played,
+            [
+                SimpleNamespace(name="Starter", minutes_played=36.2),
+                SimpleNamespace(name="Bench", minutes_played=0),
+                SimpleNamespace(name="DNP", minutes_played=None),
+            ],
+        ),
+        (
+            frame_filter_mlb_at_least_one_ab_or_ip,
+            filter_mlb_at_least_one_ab_or_ip,
+            [
+                SimpleNamespace(name="Batter", at_bats=4, innings_pitched=None),
+                SimpleNamespace(name="Pitcher", at_bats=0, innings_pitched=6.1),
+                SimpleNamespace(name="Bench", at_bats=0, innings_pitched=0),
+            ],
+        ),
+    ],
+)
+def test_frame_filters_match_row_filters(frame_filter, row_filter, player_boxscores):
+    player_boxscores.append(UnreadablePlayerBoxscore())
+    mask = frame_filter(player_stat_frame(player_boxscores, frame_filter.columns))
+    expected = [bool(row_filter(None, None, player_boxscore)) for player_boxscore in player_boxscores]
+    assert mask.tolist() == expected
+
+
+def test_player_stat_frame_coerces_stats_to_numbers():
+    frame = player_stat_frame(
+        [SimpleNamespace(at_bats=4, innings_pitched="6.1"), SimpleNamespace(at_bats=None, innings_pitched="")],
+        ["at_bats", "innings_pitched"],
+    )
+    assert frame.to_dict("list") == {"at_bats": [4, 0], "innings_pitched": [6.1, 0]}
+
+
+def test_filter_player_boxscores_applies_every_frame_filter_in_order():
+    boxscore = mock.Mock()
+    pairs = [
+        (boxscore, SimpleNamespace(player_id="a", at_bats=4, innings_pitched=0, minutes_played=0)),
+        (boxscore, SimpleNamespace(player_id="b", at_bats=0, innings_pitched=0, minutes_played=12)),
+        (boxscore, SimpleNamespace(player_id="c", at_bats=1, innings_pitched=0, minutes_played=3)),
+    ]
+    kept = filter_player_boxscores(
+        pairs, [frame_filter_mlb_at_least_one_ab_or_ip, frame_filter_nba_at_least_one_minute_played]
+    )
+    assert [player_boxscore.player_id for _, player_boxscore in kept] == ["c"]
+    assert filter_player_boxscores(list(), frame_filter_mlb_at_least_one_ab_or_ip) == list()
@@ -0,0 +1,78 @@
+import pytest
+from unittest import mock
+
+import requests
+
+from sportblurbs import http_cache
+from sportblurbs.exception import OfflineCacheMissError
+from sportblurbs.http_cache import ResponseCache
+
+url = "https://www.sports-reference.com/boxscores/201806150MEL.html"
+body = b"<html>Melonheads 7, Wombats 4</html>"
+etag = '"abc123"'
+
+
+def _response(status_code=200, content=body, headers=None):
+    response = requests.models.Response()
+    response.url = url
+    response.status_code = status_code
+    response._content = content
+    response.encoding = "utf-8"
+    response.headers = requests.structures.CaseInsensitiveDict(headers or {"ETag": etag})
+    return response
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path))
+
+
+def test_get_stores_response_and_revalidates_with_etag(cache):
+    with mock.patch("sportblurbs.http_cache._request_get", return_value=_response()) as request_get:
+        assert cache.get(url).content == body
+    assert cache.misses == 1
+
+    with mock.patch("sportblurbs.http_cache._request_get", return_value=_response(304, b"")) as request_get:
+        response = cache.get(url)
+    assert request_get.call_args[1]["headers"]["If-None-Match"] == etag
+    assert response.status_code == 200
+    assert response.text == body.decode()
+    assert cache.stats() == {"hits": 1, "misses": 1, "revalidated": 1}
+
+
+def test_identical_bodies_are_stored_once(cache, tmp_path):
+    with mock.patch("sportblurbs.http_cache._request_get", return_value=_response()):
+        cache.get(url)
+        cache.get(url + "?page=2")
+    assert len(list((tmp_path / "objects").iterdir())) == 1
+    assert len(list((tmp_path / "index").iterdir())) == 2
+
+
+@pytest.mark.parametrize("status_code", [404, 429, 503])
+def test_error_responses_are_not_stored(cache, tmp_path, status_code):
+    with mock.patch("sportblurbs.http_cache._request_get", return_value=_response(status_code)):
+        assert cache.get(url).status_code == status_code
+    assert not list((tmp_path / "index").iterdir())
+
+
+def test_offline_serves_only_from_cache(cache, tmp_path):
+    with mock.patch("sportblurbs.http_cache._request_get", return_value=_response()):
+        cache.get(url)
+
+    offline_cache = ResponseCache(str(tmp_path), offline=True)
+    with mock.patch("sportblurbs.http_cache._request_get") as request_get:
+        assert offline_cache.get(url).content == body
+        assert offline_cache.head(url).status_code == 200
+        with pytest.raises(OfflineCacheMissError):
+            offline_cache.get(url + "?missing")
+    request_get.assert_not_called()
+
+
+def test_install_routes_requests_through_cache(cache):
+    http_cache.install(cache)
+    try:
+        assert requests.get == cache.get
+        assert http_cache.installed_cache() is cache
+    finally:
+        http_cache.uninstall()
+    assert requests.get is http_cache._request_get
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["sportsipy", "pandas", "numpy", "pyquery", "lxml", "openai"]
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["sportblurbs.utils", "sportblurbs.league", "sportblurbs.writer", "sportblurbs.process", "sportblurbs.spin"],
+)
+def test_importing_does_not_load_heavy_dependencies(module):
+    code = f"import sys, {module}; print(' '.join(sorted(sys.modules)))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env={**os.environ, "PYTHONPATH": ROOT}, capture_output=True, text=True
+    )
+    assert output.returncode == 0, output.stderr
+    assert not set(HEAVY_MODULES) & set(output.stdout.split())
+
+
+def test_league_module_is_imported_on_first_use():
+    from sportblurbs.league import League
+
+    league = League("NFL", "sportsipy.nfl", season_start=(8, 1))
+    assert league.league_module.boxscore.Boxscores
+    assert league.league_module.roster.Player
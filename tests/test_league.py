@@ -1,8 +1,12 @@
 from datetime import datetime, timedelta
+import pandas as pd
 import pytest
 from unittest import mock
 
-from sportblurbs.league import League, nfl
+from sportblurbs.cache import Cache, PlayerCache
+from sportblurbs.filter import filter_player_has_position, filter_player_has_team
+from sportblurbs.league import League, NflLeague, nfl
+from sportblurbs.record import PlayerRef
 
 league_name = "SLN"
 season_start = (6, 1)
@@ -55,10 +59,14 @@ def test_get_player_from_a_given_season(league, season):
 @pytest.mark.parametrize(
     "date,expected_week",
     [
-        (datetime(year=2014, month=8, day=5), (2014, "preseason")),
+        (datetime(year=2014, month=8, day=5), (2014, "P1")),
         (datetime(year=2014, month=9, day=2), (2014, 1)),
         (datetime(year=2014, month=12, day=28), (2014, 17)),
-        (datetime(year=2014, month=12, day=30), (2014, "postseason")),
+        (datetime(year=2014, month=12, day=30), (2014, 18)),
+        (datetime(year=2015, month=1, day=27), (2014, 21)),
+        (datetime(year=2015, month=2, day=1), (2014, 21)),
+        (datetime(year=2015, month=2, day=3), (2014, None)),
+        (datetime(year=2014, month=8, day=1), (2014, None)),
         (datetime(year=2022, month=1, day=9), (2021, 18)),
     ],
 )
@@ -74,9 +82,135 @@ def test_nfl_get_week_for_a_given_date(date, expected_week):
         (
             datetime(year=2014, month=8, day=1),
             datetime(year=2016, month=2, day=10),
-            [(y, w) for y in range(2014, 2016) for w in range(1, 18)],
+            [(y, w) for y in range(2014, 2016) for w in range(1, 22)],
         ),
     ],
 )
 def test_nfl_get_weeks_between_a_date_range(start_date, end_date, expected_weeks):
     assert nfl.get_weeks(start_date, end_date) == expected_weeks
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_get_boxscores_for_dates_returns_boxscores_in_schedule_order(league, max_workers):
+    dates = [datetime(2021, 6, d) for d in range(1, 4)]
+    games = {league.date_string(date): [{"boxscore": f"{date.day}-{g}"} for g in range(3)] for date in dates}
+    league.max_workers = max_workers
+    league.get_games = lambda date: games[league.date_string(date)]
+    league.league_module.boxscore.Boxscore.side_effect = lambda uri: f"boxscore-{uri}"
+    boxscores = league.get_boxscores_for_dates(dates)
+    assert boxscores == [f"boxscore-{game['boxscore']}" for date in dates for game in games[league.date_string(date)]]
+
+
+def test_get_boxscores_for_dates_only_fetches_uncached_dates(league):
+    date = datetime(2021, 6, 1)
+    league.get_games = mock.Mock(return_value=[{"boxscore": "uri"}])
+    league.get_boxscores(date)
+    league.get_boxscores_for_dates([date, date])
+    league.get_games.assert_called_once()
+
+
+def test_get_players_deduplicates_player_ids(league):
+    league.max_workers = 4
+    players = league.get_players(["a", "b", "a", "c", "b"], season=2021)
+    assert list(players) == ["a", "b", "c"]
+    assert league.league_module.roster.Player.call_count == 3
+
+
+def test_get_players_only_rate_limits_players_missing_from_the_cache(league):
+    league.player_cache = PlayerCache()
+    league.get_player("a", 2021)
+    league.rate_limiter = mock.Mock()
+    players = league.get_players(["a", "b", "c"], season=2021)
+    assert list(players) == ["a", "b", "c"]
+    assert league.rate_limiter.wait.call_count == 2
+    assert league.league_module.roster.Player.call_count == 3
+
+
+def test_player_cache_keeps_player_refs_instead_of_players(league, tmp_path):
+    player = league.league_module.roster.Player.return_value.return_value
+    player.configure_mock(player_id=player_id, name="Test Player", position="QB", team_abbreviation="sln")
+    league.player_cache = PlayerCache(str(tmp_path / "players.db"))
+    expected = PlayerRef(player_id, "Test Player", "QB", "sln")
+    assert league.get_player(player_id, 2021) == expected
+    assert PlayerCache(str(tmp_path / "players.db")).get((league_name, player_id, "2021")) == expected
+
+
+def test_players_without_a_row_for_the_season_are_kept_for_the_filters_to_drop(league):
+    class Player:
+        player_id = "TestPlayerId"
+        name = "Test Player"
+
+        @property
+        def position(self):
+            raise TypeError("'NoneType' object is not subscriptable")
+
+        team_abbreviation = position
+
+    league.league_module.roster.Player.return_value.return_value = Player()
+    players = league.get_players([player_id], season=2021)
+    assert players[player_id] == PlayerRef(player_id, "Test Player", None, None)
+    assert not filter_player_has_position(None, players[player_id], None)
+    assert not filter_player_has_team(None, players[player_id], None)
+
+
+def test_get_player_uses_player_cache(league):
+    league.player_cache = PlayerCache()
+    first = league.get_player(player_id, 2021)
+    second = league.get_player(player_id, 2021)
+    assert first is second
+    assert league.league_module.roster.Player.call_count == 1
+    assert league.player_cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize(
+    "date,expected_week",
+    [
+        (datetime(year=2012, month=9, day=3, hour=23), (2012, "P4")),
+        (datetime(year=2012, month=9, day=4), (2012, 1)),
+        (datetime(year=2012, month=9, day=10, hour=23), (2012, 1)),
+        (datetime(year=2012, month=9, day=11), (2012, 2)),
+        (datetime(year=2012, month=12, day=31, hour=23), (2012, 17)),
+        (datetime(year=2013, month=1, day=1), (2012, 18)),
+    ],
+)
+def test_nfl_get_week_at_week_boundaries(date, expected_week):
+    assert nfl.get_week(date) == expected_week
+
+
+def test_nfl_season_length_comes_from_the_week_index():
+    assert [NflLeague.season_length(season) for season in (2002, 2020, 2021, 2026)] == [17, 17, 18, 18]
+
+
+def test_nfl_seasons_outside_the_week_index_are_built_once_and_cached(tmp_path):
+    week_one = datetime(1999, 9, 12)
+    schedule = mock.Mock()
+    schedule.dataframe = {"datetime": pd.Series([week_one])}
+    path = str(tmp_path / "cache.db")
+    with mock.patch("sportsipy.nfl.schedule.Schedule", return_value=schedule) as schedule_class:
+        league = NflLeague("NFL", mock.MagicMock(), season_start=(8, 1), schedule_cache=Cache(path, ttl=None))
+        assert league.get_week(datetime(1999, 9, 20)) == (1999, 2)
+        league = NflLeague("NFL", mock.MagicMock(), season_start=(8, 1), schedule_cache=Cache(path, ttl=None))
+        assert league.get_week(datetime(1999, 9, 20)) == (1999, 2)
+    schedule_class.assert_called_once_with("NWE", 1999)
+    assert league.get_week(datetime(1999, 8, 10)) == (1999, "P1")
+    assert league.get_week(datetime(2000, 1, 4)) == (1999, 18)
+    assert league.get_week(datetime(2000, 1, 25)) == (1999, 21)
+    assert league.get_week(datetime(2000, 2, 1)) == (1999, None)
+
+
+def test_nfl_get_games_fetches_the_week_of_the_season():
+    league = NflLeague("NFL", mock.MagicMock(), season_start=(8, 1))
+    boxscores_class = league.league_module.boxscore.Boxscores
+    boxscores_class.return_value.games = {"19-2021": [{"boxscore": "202201150cin"}]}
+    assert league.get_games(datetime(2022, 1, 15)) == [{"boxscore": "202201150cin"}]
+    boxscores_class.assert_called_once_with(week=19, year=2021)
+    assert league.get_games((2021, "P1")) == list()
+
+
+def test_default_dates_are_taken_when_called():
+    league = NflLeague("NFL", mock.MagicMock(), season_start=(8, 1))
+    with mock.patch("sportblurbs.league.datetime", wraps=datetime) as datetime_class:
+        datetime_class.utcnow.return_value = datetime(2021, 10, 10)
+        assert league.get_week() == (2021, 5)
+        datetime_class.utcnow.return_value = datetime(2021, 10, 20)
+        assert league.get_week() == (2021, 7)
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+from unittest import mock
+
+from sportblurbs import metrics
+from sportblurbs.metrics import Metrics, NullMetrics
+
+
+@pytest.fixture
+def run_metrics():
+    previous = metrics.get_metrics()
+    run_metrics = Metrics()
+    metrics.set_metrics(run_metrics)
+    yield run_metrics
+    metrics.set_metrics(previous)
+
+
+def test_timer_records_count_total_and_max(run_metrics):
+    with mock.patch("sportblurbs.metrics.time.perf_counter", side_effect=[0.0, 1.0, 1.0, 3.0]):
+        with metrics.timer("fetch.boxscore"):
+            pass
+        with metrics.timer("fetch.boxscore"):
+            pass
+    assert run_metrics.report()["timers"] == {"fetch.boxscore": {"count": 2, "total": 3.0, "max": 2.0}}
+
+
+def test_timer_records_when_the_timed_block_raises(run_metrics):
+    with pytest.raises(ValueError):
+        with metrics.timer("fetch.player"):
+            raise ValueError()
+    assert run_metrics.report()["timers"]["fetch.player"]["count"] == 1
+
+
+def test_write_json_and_prometheus_reports(run_metrics, tmp_path):
+    run_metrics.observe("db.game.bulk_write", 0.5)
+    metrics.increment("cache.player.hits", 3)
+    run_metrics.write_json(tmp_path / "run.json")
+    run_metrics.write_prometheus(tmp_path / "run.prom")
+    assert json.loads((tmp_path / "run.json").read_text())["counters"] == {"cache.player.hits": 3}
+    prometheus = (tmp_path / "run.prom").read_text()
+    assert "sportblurbs_db_game_bulk_write_seconds_sum 0.5" in prometheus
+    assert "sportblurbs_db_game_bulk_write_seconds_count 1" in prometheus
+    assert "sportblurbs_cache_player_hits_total 3" in prometheus
+
+
+def test_null_metrics_records_nothing():
+    null_metrics = NullMetrics()
+    with null_metrics.timer("fetch.games"):
+        null_metrics.increment("fetches.games")
+    assert null_metrics.report() == {"timers": {}, "counters": {}}
@@ -0,0 +1,161 @@
+import weakref
+
+import pytest
+from unittest import mock
+
+from sportblurbs.process import get_uris_to_process, process_boxscores, process_games
+
+
+@pytest.fixture
+def league():
+    league = mock.Mock()
+    league.iter_boxscores.side_effect = lambda dates: iter(f"boxscore-{i}" for i in range(5))
+    league.get_boxscores_for_dates.return_value = [f"boxscore-{i}" for i in range(5)]
+    return league
+
+
+@pytest.fixture
+def database():
+    return mock.MagicMock()
+
+
+def test_process_games_streams_boxscores_in_chunks(league, database):
+    with mock.patch("sportblurbs.process.process_boxscores") as process_boxscores:
+        process_games(["date"], league, database=database, chunk_size=2)
+    chunks = [call_args[0][0] for call_args in process_boxscores.call_args_list]
+    assert chunks == [["boxscore-0", "boxscore-1"], ["boxscore-2", "boxscore-3"], ["boxscore-4"]]
+    league.get_boxscores_for_dates.assert_not_called()
+
+
+def test_process_games_processes_all_boxscores_at_once_without_chunk_size(league, database):
+    with mock.patch("sportblurbs.process.process_boxscores") as process_boxscores:
+        process_games(["date"], league, database=database)
+    process_boxscores.assert_called_once()
+    assert process_boxscores.call_args[0][0] == [f"boxscore-{i}" for i in range(5)]
+    league.iter_boxscores.assert_not_called()
+
+
+def test_get_uris_to_process_only_returns_completed_games_not_yet_processed(database):
+    games = [
+        {"boxscore": "new", "home_score": None},
+        {"boxscore": "new-and-completed", "home_score": 0},
+        {"boxscore": "in-progress", "home_score": None},
+        {"boxscore": "newly-completed", "home_score": 3},
+        {"boxscore": "processed", "home_score": 5},
+    ]
+    game_docs = {
+        "in-progress": {"processed": False},
+        "newly-completed": {"processed": False},
+        "processed": {"processed": True},
+    }
+    with mock.patch("sportblurbs.process.get_documents_by_key", return_value=game_docs):
+        assert get_uris_to_process(games, database) == ["new-and-completed", "newly-completed"]
+
+
+def test_process_games_incremental_only_builds_boxscores_for_games_to_process(league, database):
+    league.get_boxscores_for_uris.side_effect = lambda uris: [f"boxscore-{uri}" for uri in uris]
+    league.get_games_for_dates.return_value = list()
+    with mock.patch("sportblurbs.process.get_uris_to_process", return_value=["a", "b", "c"]), mock.patch(
+        "sportblurbs.process.process_boxscores"
+    ) as process_boxscores:
+        process_games(["date"], league, database=database, chunk_size=2, incremental=True)
+    chunks = [call_args[0][0] for call_args in process_boxscores.call_args_list]
+    assert chunks == [["boxscore-a", "boxscore-b"], ["boxscore-c"]]
+    league.get_boxscores_for_dates.assert_not_called()
+    league.iter_boxscores.assert_not_called()
+
+
+@pytest.mark.parametrize("transactional", [False, True])
+def test_process_boxscores_writes_blurbs_before_marking_games_processed(database, transactional):
+    boxscore = mock.Mock(_uri="game-0", home_points=3, away_points=1, winning_abbr="h", losing_abbr="a")
+    session = database.client.start_session.return_value.__enter__.return_value
+    session.with_transaction.side_effect = lambda callback: callback(session)
+    writes = mock.Mock()
+    with mock.patch("sportblurbs.process.get_documents_by_key", return_value=dict()), mock.patch(
+        "sportblurbs.process.create_game_document", return_value={"processed": False}
+    ), mock.patch("sportblurbs.process.write_player_blurbs_from_boxscores", return_value=["blurb"]), mock.patch(
+        "sportblurbs.process.create_blurb_documents", return_value=["blurb-doc"]
+    ), mock.patch(
+        "sportblurbs.process.put_blurb_documents", writes.put_blurb_documents
+    ), mock.patch(
+        "sportblurbs.process.update_documents", writes.update_documents
+    ):
+        process_boxscores([boxscore], mock.Mock(), database, transactional=transactional)
+    assert [call[0] for call in writes.mock_calls] == ["put_blurb_documents", "update_documents"]
+    assert list(writes.update_documents.call_args[0][2]) == [{"processed": True, "complete": True}]
+    expected_session = session if transactional else None
+    assert writes.put_blurb_documents.call_args[1]["session"] is expected_session
+    assert writes.update_documents.call_args[1]["session"] is expected_session
+    assert database.client.start_session.called is transactional
+
+
+class Boxscore:
+    _uri = "game-0"
+    home_points = 3
+    away_points = 1
+    winning_abbr = "h"
+    losing_abbr = "a"
+
+
+def test_process_boxscores_releases_boxscores_before_writing(database):
+    boxscore_refs = list()
+    released = list()
+
+    def new_boxscores():
+        boxscore = Boxscore()
+        boxscore_refs.append(weakref.ref(boxscore))
+        return [boxscore]
+
+    with mock.patch("sportblurbs.process.get_documents_by_key", return_value=dict()), mock.patch(
+        "sportblurbs.process.create_game_document", lambda boxscore, league: {"processed": False}
+    ), mock.patch("sportblurbs.process.write_player_blurbs_from_boxscores", lambda *args: ["blurb"]), mock.patch(
+        "sportblurbs.process.create_blurb_documents", return_value=["blurb-doc"]
+    ), mock.patch(
+        "sportblurbs.process.write_documents", lambda *args: released.append(boxscore_refs[0]() is None)
+    ):
+        process_boxscores(new_boxscores(), mock.Mock(), database)
+        boxscores = [Boxscore()]
+        process_boxscores(boxscores, mock.Mock(), database)
+    assert released == [True, True]
+    # The caller's own list is left alone.
+    assert len(boxscores) == 1
+
+
+def _unscored_nfl_boxscore():
+    from pyquery import PyQuery
+    from sportsipy.nfl.boxscore import Boxscore as NflBoxscore
+
+    with mock.patch.object(NflBoxscore, "_parse_game_data"):
+        boxscore = NflBoxscore("202110170kan")
+    boxscore._date = "Sunday Oct 17, 2021"
+    boxscore._home_name = PyQuery('<div><a href="/teams/kan/2021.htm">Kansas City Chiefs</a></div>')
+    boxscore._away_name = PyQuery('<div><a href="/teams/was/2021.htm">Washington Football Team</a></div>')
+    return boxscore
+
+
+def test_process_boxscores_stores_games_without_a_score_and_rebuilds_them_once_complete(database):
+    league = mock.Mock()
+    league.name = "NFL"
+    boxscore = _unscored_nfl_boxscore()
+    with mock.patch("sportblurbs.process.get_documents_by_key", return_value=dict()), mock.patch(
+        "sportblurbs.process.write_documents"
+    ) as write_documents:
+        process_boxscores([boxscore], league, database)
+    (game_doc,) = write_documents.call_args[0][2]
+    assert (game_doc["complete"], game_doc["processed"]) == (False, False)
+    assert [(team["name"], team["score"], team["is_home"]) for team in game_doc["game"]["teams"]] == [
+        ("Kansas City Chiefs", None, True),
+        ("Washington Football Team", None, False),
+    ]
+
+    boxscore._home_points, boxscore._away_points = 31, 13
+    with mock.patch("sportblurbs.process.get_documents_by_key", return_value={boxscore._uri: game_doc}), mock.patch(
+        "sportblurbs.process.write_player_blurbs_from_boxscores", return_value=list()
+    ), mock.patch("sportblurbs.process.write_documents") as write_documents:
+        process_boxscores([boxscore], league, database)
+    (game_doc,) = write_documents.call_args[0][2]
+    assert (game_doc["complete"], game_doc["processed"]) == (True, True)
+    assert [(team["abbreviation"], team["score"], team["is_home"]) for team in game_doc["game"]["teams"]] == [
+        ("KAN", 31, True),
+        ("WAS", 13, False),
+    ]
@@ -0,0 +1,167 @@
+from datetime import datetime
+import json
+import os
+import socket
+import threading
+import time
+
+import pytest
+from unittest import mock
+
+from sportblurbs.database import BLURB_COLLECTION, PUBLISHER_COLLECTION
+from sportblurbs.publish import (
+    create_blurb_notification,
+    FileSpoolSink,
+    Publisher,
+    UnixSocketSink,
+    WebhookSink,
+)
+
+mongomock = pytest.importorskip("mongomock")
+
+
+class ChangeStream:
+    def __init__(self, changes):
+        self.changes = list(changes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def try_next(self):
+        if self.changes:
+            return self.changes.pop(0)
+        time.sleep(0.01)
+        return None
+
+
+def _blurb_document(i):
+    return {
+        "_id": f"blurb-{i}",
+        "key": f"game|player-{i}|source",
+        "date": datetime(2021, 10, 10),
+        "game": {"id": "game"},
+        "player": {"id": f"player-{i}"},
+        "blurb": {"news": f"news-{i}"},
+    }
+
+
+def _changes(num_changes):
+    return [{"_id": {"_data": f"token-{i}"}, "fullDocument": _blurb_document(i)} for i in range(num_changes)]
+
+
+@pytest.fixture
+def stream():
+    return ChangeStream(_changes(5))
+
+
+@pytest.fixture
+def database(stream):
+    blurb_collection = mock.Mock()
+    blurb_collection.watch.return_value = stream
+    collections = {
+        BLURB_COLLECTION: blurb_collection,
+        PUBLISHER_COLLECTION: mongomock.MongoClient()["sportblurbs-test"][PUBLISHER_COLLECTION],
+    }
+    database = mock.MagicMock()
+    database.__getitem__.side_effect = collections.__getitem__
+    return database
+
+
+@pytest.fixture
+def sink():
+    return mock.Mock()
+
+
+def _publisher(sink, database, **kwargs):
+    return Publisher(sink, database, batch_interval=0.2, max_backoff=0.01, max_await=0.05, **kwargs)
+
+
+def test_blurbs_are_sent_in_batches_and_the_resume_token_is_saved(sink, database):
+    publisher = _publisher(sink, database, batch_size=2)
+    assert publisher.run(max_batches=3) == 3
+    batches = [call[0][0] for call in sink.send.call_args_list]
+    assert [[notification["key"] for notification in batch] for batch in batches] == [
+        ["game|player-0|source", "game|player-1|source"],
+        ["game|player-2|source", "game|player-3|source"],
+        ["game|player-4|source"],
+    ]
+    assert database[BLURB_COLLECTION].watch.call_args[1]["resume_after"] is None
+    assert publisher.resume_token() == {"_data": "token-4"}
+
+
+def test_publisher_resumes_after_the_saved_token_and_raises_stream_errors(sink, database):
+    publisher = _publisher(sink, database)
+    publisher.save_resume_token({"_data": "token-1"})
+    database[BLURB_COLLECTION].watch.side_effect = RuntimeError("not a replica set")
+    with pytest.raises(RuntimeError, match="not a replica set"):
+        publisher.run()
+    assert database[BLURB_COLLECTION].watch.call_args[1]["resume_after"] == {"_data": "token-1"}
+
+
+def test_failed_batches_are_retried_before_the_resume_token_moves(sink, database):
+    sink.send.side_effect = [OSError("connection refused"), OSError("connection refused"), None]
+    publisher = _publisher(sink, database, batch_size=5)
+    publisher.run(max_batches=1)
+    assert sink.send.call_count == 3
+    assert publisher.resume_token() == {"_data": "token-4"}
+
+
+def test_stream_is_not_read_past_a_full_queue(sink, database, stream):
+    stream.changes = _changes(10)
+    release = threading.Event()
+    sink.send.side_effect = lambda notifications: release.wait()
+    publisher = _publisher(sink, database, batch_size=1, queue_size=2)
+    thread = threading.Thread(target=publisher.run, kwargs={"max_batches": 1})
+    thread.start()
+    # One blurb is with the sink, two are queued and one is waiting to be queued.
+    deadline = time.monotonic() + 5
+    while len(stream.changes) > 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.2)
+    assert len(stream.changes) == 6
+    release.set()
+    thread.join()
+
+
+def test_create_blurb_notification_is_json_serializable():
+    notification = create_blurb_notification(_blurb_document(0))
+    assert json.loads(json.dumps(notification)) == {
+        "id": "blurb-0",
+        "key": "game|player-0|source",
+        "date": "2021-10-10T00:00:00",
+        "game": {"id": "game"},
+        "player": {"id": "player-0"},
+        "blurb": {"news": "news-0"},
+    }
+
+
+def test_webhook_sink_posts_batches():
+    with mock.patch("sportblurbs.publish.requests.post") as post:
+        WebhookSink("http://localhost:8080/blurbs").send([{"key": "a"}])
+    assert post.call_args[0][0] == "http://localhost:8080/blurbs"
+    assert json.loads(post.call_args[1]["data"]) == {"blurbs": [{"key": "a"}]}
+    post.return_value.raise_for_status.assert_called_once()
+
+
+def test_unix_socket_sink_sends_a_line_per_batch(tmp_path):
+    path = str(tmp_path / "blurbs.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(path)
+        server.listen(1)
+        UnixSocketSink(path).send([{"key": "a"}])
+        connection, _ = server.accept()
+        with connection, connection.makefile() as lines:
+            assert [json.loads(line) for line in lines] == [{"blurbs": [{"key": "a"}]}]
+
+
+def test_file_spool_sink_writes_a_file_per_batch_in_order(tmp_path):
+    sink = FileSpoolSink(str(tmp_path / "spool"))
+    for key in ["a", "b", "c"]:
+        sink.send([{"key": key}])
+    names = sorted(os.listdir(tmp_path / "spool"))
+    assert not [name for name in names if name.startswith(".")]
+    batches = [json.loads((tmp_path / "spool" / name).read_text()) for name in names]
+    assert batches == [{"blurbs": [{"key": key}]} for key in ["a", "b", "c"]]
@@ -0,0 +1,42 @@
+import pytest
+from unittest import mock
+
+from sportblurbs.record import BlurbRecord, GameRecord, PlayerRef
+
+
+@pytest.fixture
+def boxscore():
+    bs = mock.Mock()
+    bs._uri = "200806150MEL"
+    bs.date = "06/15/2008"
+    bs._home_name.text.return_value = "Melonheads"
+    bs.home_points = 7
+    bs.away_points = 4
+    bs.winning_name = "Melonheads"
+    bs.winning_abbr = "mel"
+    bs.losing_name = "Wombats"
+    bs.losing_abbr = "wom"
+    return bs
+
+
+@pytest.mark.parametrize("record_type", [PlayerRef, BlurbRecord, GameRecord])
+def test_records_are_slotted(record_type):
+    assert not hasattr(record_type.__new__(record_type), "__dict__")
+
+
+def test_player_ref_copies_player_fields():
+    player = mock.Mock(player_id="sanchpa01", position="SS", team_abbreviation="MEL")
+    player.name = "Pablo Sanchez"
+    assert PlayerRef.from_player(player) == PlayerRef("sanchpa01", "Pablo Sanchez", "SS", "MEL")
+
+
+def test_game_record_copies_boxscore_fields(boxscore):
+    game = GameRecord.from_boxscore(boxscore)
+    assert game == GameRecord("200806150MEL", "06/15/2008", "Melonheads", 7, 4, "Melonheads", "mel", "Wombats", "wom")
+    assert game.complete
+
+
+def test_game_record_is_not_complete_without_scores(boxscore):
+    boxscore.home_points = None
+    boxscore.away_points = None
+    assert not GameRecord.from_boxscore(boxscore).complete
@@ -0,0 +1,110 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+import pytest
+
+from sportblurbs.cache import Cache
+from sportblurbs.spin import spin_cache, SpinEngine
+from sportblurbs.writer import write_spins
+
+news_list = [f"Pablo Sanchez hit {n} home runs in Sunday's 7-4 win over the Wombats." for n in range(5)]
+
+
+class FakeCompletionHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server.requests.append(body)
+        if server.failures:
+            server.failures -= 1
+            self._respond(429, {"error": {"message": "Rate limit reached", "type": "requests"}})
+            return
+        prompts = body["prompt"] if isinstance(body["prompt"], list) else [body["prompt"]]
+        choices = [{"text": f" spin {len(prompt)}", "index": index} for index, prompt in enumerate(prompts)]
+        self._respond(200, {"object": "text_completion", "choices": choices, "usage": {"total_tokens": 10}})
+
+    def _respond(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def completion_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCompletionHandler)
+    server.requests = list()
+    server.failures = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _engine(completion_server, model="fake-model", **kwargs):
+    api_base = f"http://127.0.0.1:{completion_server.server_address[1]}/v1"
+    return SpinEngine(model=model, api_key="test-key", api_base=api_base, backoff=0, **kwargs)
+
+
+def test_spin_many_batches_news_into_few_requests(completion_server):
+    engine = _engine(completion_server, batch_size=2, max_workers=3)
+    spins = engine.spin_many(news_list)
+    assert len(completion_server.requests) == 3
+    assert all(spin.startswith("spin ") for spin in spins)
+    assert sorted(len(request["prompt"]) for request in completion_server.requests) == [1, 2, 2]
+
+
+def test_spin_many_returns_spins_in_news_order(completion_server):
+    engine = _engine(completion_server, batch_size=5, prompt="{news}")
+    assert engine.spin_many(news_list) == [f"spin {len(news)}" for news in news_list]
+
+
+def test_spin_many_reuses_cached_spins(completion_server):
+    cache = Cache(table="spin", ttl=None)
+    _engine(completion_server, cache=cache).spin_many(news_list)
+    engine = _engine(completion_server, cache=cache)
+    engine.spin_many(news_list + news_list[:1])
+    assert len(completion_server.requests) == 1
+
+
+@pytest.mark.parametrize("kwargs", [{"prompt_version": "2"}, {"model": "another-model"}])
+def test_prompt_version_and_model_change_cache_key(completion_server, kwargs):
+    assert _engine(completion_server).cache_key(news_list[0]) != _engine(completion_server, **kwargs).cache_key(
+        news_list[0]
+    )
+
+
+def test_spin_cache_keeps_spins_between_runs(completion_server, tmp_path):
+    path = str(tmp_path / "cache" / "spin.sqlite")
+    _engine(completion_server, cache=spin_cache(path)).spin_many(news_list)
+    _engine(completion_server, cache=spin_cache(path)).spin_many(news_list)
+    assert len(completion_server.requests) == 1
+
+
+def test_spin_retries_rate_limited_requests(completion_server):
+    completion_server.failures = 2
+    spins = _engine(completion_server, batch_size=5).spin_many(news_list)
+    assert len(completion_server.requests) == 3
+    assert all(spins)
+
+
+def test_spin_skips_news_over_token_budget(completion_server):
+    engine = _engine(completion_server, batch_size=1, max_workers=1, max_tokens=10, token_budget=60)
+    spins = engine.spin_many(news_list)
+    assert spins[0]
+    assert spins[-1] == ""
+    assert len(completion_server.requests) < len(news_list)
+
+
+def test_write_spins_uses_spin_many_when_available(completion_server):
+    engine = _engine(completion_server, batch_size=5)
+    write_spins(engine, news_list)
+    assert len(completion_server.requests) == 1
+    assert write_spins(lambda news: news.upper(), news_list[:1]) == [news_list[0].upper()]
@@ -0,0 +1,138 @@
+import pytest
+from types import SimpleNamespace
+from unittest import mock
+
+from sportblurbs import template
+from sportblurbs.context import GameContext
+from sportblurbs.template import (
+    Clause,
+    GENERIC_NEWS,
+    MLB_NEWS,
+    NBA_NEWS,
+    NFL_NEWS,
+    NewsTemplates,
+    Summary,
+    Template,
+)
+
+
+@pytest.fixture
+def boxscore():
+    return SimpleNamespace(
+        date="2008-06-15",
+        winning_name="Melonheads",
+        winning_abbr="mel",
+        losing_name="Wombats",
+        losing_abbr="wom",
+        home_points=7,
+        away_points=4,
+    )
+
+
+def _player(team_abbreviation="MEL", position=None):
+    return SimpleNamespace(name="Pablo Sanchez", position=position, team_abbreviation=team_abbreviation)
+
+
+def test_clause_renders_fields_and_format_specs():
+    clause = Clause("{player.name} played {stats.minutes_played:.0f} minutes")
+    namespace = {"player": _player(), "stats": SimpleNamespace(minutes_played=31.6)}
+    assert clause.render(namespace) == "Pablo Sanchez played 32 minutes"
+
+
+@pytest.mark.parametrize(
+    "when, rush_attempts, expected",
+    [
+        ("stats.rush_attempts", 3, True),
+        ("stats.rush_attempts", 0, False),
+        ("!stats.rush_attempts", 0, True),
+        (["stats.rush_attempts", "won"], 3, False),
+    ],
+)
+def test_clause_applies_when_conditions_hold(when, rush_attempts, expected):
+    namespace = {"stats": SimpleNamespace(rush_attempts=rush_attempts), "won": False}
+    assert Clause("", when=when).applies(namespace) == expected
+
+
+def test_template_drops_empty_summaries():
+    template = Template("{player.name} had", Summary([("stats.points", "point")], prefix="with"), "nothing else")
+    namespace = {"player": _player(), "stats": SimpleNamespace(points=0)}
+    assert template.render(namespace) == "Pablo Sanchez had nothing else"
+    namespace["stats"].points = 1
+    assert template.render(namespace) == "Pablo Sanchez had with a point nothing else"
+
+
+def test_news_templates_reuse_a_game_context(boxscore):
+    news_templates = NewsTemplates(default=Template("{game.weekday}"))
+    context = GameContext(boxscore)
+    with mock.patch.object(template, "GameContext", wraps=GameContext) as game_context:
+        game_context.of = GameContext.of
+        for _ in range(3):
+            assert news_templates(context, _player(), None) == "Sunday"
+        game_context.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "team_abbreviation, result", [("MEL", "win over the Wombats."), ("WOM", "loss to the Melonheads.")]
+)
+def test_nfl_news_uses_the_players_result(boxscore, team_abbreviation, result):
+    stats = SimpleNamespace(rush_attempts=12, rush_yards=55, rush_touchdowns=1, fumbles_lost=0, receptions=0)
+    news = NFL_NEWS(boxscore, _player(team_abbreviation, "RB"), stats)
+    assert news == f"Pablo Sanchez rushed 12 times for 55 yards and a touchdown in Sunday's 7-4 {result}"
+
+
+def test_generic_news(boxscore):
+    news = GENERIC_NEWS(boxscore, _player(), None)
+    assert news == "Pablo Sanchez played in the Melonheads's 7 - 4 win over the Wombats on Sunday."
+
+
+@pytest.mark.parametrize(
+    "stats, expected",
+    [
+        (
+            dict(innings_pitched=6.1, earned_runs_allowed=2, hits_allowed=5, strikeouts=7, bases_on_balls_given=1),
+            "Pablo Sanchez pitched 6.1 innings, allowing 2 earned runs and 5 hits with 7 strikeouts and a walk",
+        ),
+        (
+            dict(
+                innings_pitched=None, hits=2, at_bats=4, runs=1, bases_on_balls=0, times_struck_out=0, runs_batted_in=3
+            ),
+            "Pablo Sanchez went 2 for 4 with a run and drove in 3",
+        ),
+    ],
+)
+def test_mlb_news(stats, expected):
+    boxscore = SimpleNamespace(
+        date="2008-06-15",
+        winning_name="Melonheads",
+        losing_name="Wombats",
+        winning_abbr="MEL",
+        losing_abbr="WOM",
+        home_runs=7,
+        away_runs=4,
+    )
+    news = MLB_NEWS(boxscore, _player(), SimpleNamespace(**stats))
+    assert news == f"{expected} in Sunday's 7-4 win over the Wombats."
+
+
+def test_nba_news(boxscore):
+    stats = SimpleNamespace(points=21, total_rebounds=1, assists=0, steals=2, blocks=0, minutes_played=33.9)
+    news = NBA_NEWS(boxscore, _player(), stats)
+    assert (
+        news
+        == "Pablo Sanchez had 21 points, a rebound and 2 steals in 34 minutes in Sunday's 7-4 win over the Wombats."
+    )
+    stats = SimpleNamespace(points=0, total_rebounds=0, assists=0, steals=0, blocks=0, minutes_played=2.0)
+    assert NBA_NEWS(boxscore, _player(), stats).startswith("Pablo Sanchez played in 2 minutes in Sunday's")
+
+
+@pytest.mark.parametrize("team_abbreviation, opponent", [("MEL", "Wombats"), ("WOM", "Melonheads")])
+def test_news_reports_ties_for_both_teams(boxscore, team_abbreviation, opponent):
+    boxscore.away_points = 7
+    stats = SimpleNamespace(rush_attempts=12, rush_yards=55, rush_touchdowns=1, fumbles_lost=0, receptions=0)
+    news = NFL_NEWS(boxscore, _player(team_abbreviation, "RB"), stats)
+    assert (
+        news == f"Pablo Sanchez rushed 12 times for 55 yards and a touchdown in Sunday's 7-7 tie with the {opponent}."
+    )
+    assert GENERIC_NEWS(boxscore, _player(team_abbreviation), None) == (
+        f"Pablo Sanchez played in the 7 - 7 tie with the {opponent} on Sunday."
+    )
@@ -1,7 +1,7 @@
 import pytest
 
 from sportblurbs.exception import KeyNotFoundError
-from sportblurbs.utils import get_value_from_document
+from sportblurbs.utils import chunked, get_value_from_document
 
 
 documents = [
@@ -27,3 +27,16 @@ def test_get_value_from_document_raises_key_not_found_error_when_key_does_not_ex
 )
 def test_get_value_from_document_returns_value(document, key, expected_value):
     assert get_value_from_document(key, document) == expected_value
+
+
+@pytest.mark.parametrize(
+    "iterable,size,expected_chunks",
+    [
+        ([], 2, []),
+        (range(4), 2, [[0, 1], [2, 3]]),
+        (range(5), 2, [[0, 1], [2, 3], [4]]),
+        (iter(range(3)), 5, [[0, 1, 2]]),
+    ],
+)
+def test_chunked_yields_bounded_chunks(iterable, size, expected_chunks):
+    assert list(chunked(iterable, size)) == expected_chunks
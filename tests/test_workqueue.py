@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+import os
+import subprocess
+import sys
+
+import pytest
+
+from sportblurbs.database import BACKFILL_COLLECTION
+from sportblurbs.workqueue import DONE, FAILED, PENDING, RUNNING, WorkQueue
+
+mongomock = pytest.importorskip("mongomock")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime(2021, 6, 1)
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def database():
+    return mongomock.MongoClient()["sportblurbs-test"]
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _queue(database, clock, owner, **kwargs):
+    return WorkQueue(database, "job", lease=60, owner=owner, clock=clock, **kwargs)
+
+
+def test_units_are_claimed_once_in_order(database, clock):
+    queue = _queue(database, clock, "a")
+    assert queue.add([("x", "x"), ("y", "y")], "game") == 2
+    assert queue.add([("x", "x")], "game") == 1
+    assert [queue.claim()["unit"], queue.claim()["unit"], queue.claim()] == ["x", "y", None]
+    assert queue.status() == {PENDING: 0, RUNNING: 2, DONE: 0, FAILED: 0}
+
+
+def test_expired_leases_are_reclaimed(database, clock):
+    first, second = _queue(database, clock, "a"), _queue(database, clock, "b")
+    first.add([("x", "x")], "game")
+    unit_doc = first.claim()
+    assert second.claim() is None
+
+    clock.now += timedelta(seconds=30)
+    assert first.renew(unit_doc)
+    clock.now += timedelta(seconds=45)
+    assert second.claim() is None
+
+    clock.now += timedelta(seconds=30)
+    reclaimed = second.claim()
+    assert reclaimed["owner"] == "b" and reclaimed["attempts"] == 2
+    # The first worker lost its lease, so it can no longer complete or renew the unit.
+    assert not first.complete(unit_doc)
+    assert not first.renew(unit_doc)
+    assert second.complete(reclaimed)
+    assert database[BACKFILL_COLLECTION].find_one()["status"] == DONE
+
+
+def test_units_of_workers_killed_on_their_last_attempt_fail(database, clock):
+    killed, other = _queue(database, clock, "a", max_attempts=1), _queue(database, clock, "b", max_attempts=1)
+    killed.add([("x", "x")], "game")
+    assert killed.claim()["attempts"] == 1
+    assert other.status() == {PENDING: 0, RUNNING: 1, DONE: 0, FAILED: 0}
+
+    clock.now += timedelta(seconds=61)
+    assert other.claim() is None
+    assert other.status() == {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 1}
+    assert "last attempt" in database[BACKFILL_COLLECTION].find_one()["error"]
+
+
+def test_work_retries_failed_units_up_to_max_attempts(database, clock):
+    queue = _queue(database, clock, "a", max_attempts=2)
+    queue.add([("x", "x"), ("y", "y")], "game")
+    seen = list()
+
+    def func(unit_doc):
+        seen.append(unit_doc["unit"])
+        if unit_doc["unit"] == "y":
+            raise ValueError("bad unit")
+
+    assert queue.work(func) == 1
+    assert seen == ["x", "y", "y"]
+    failed = database[BACKFILL_COLLECTION].find_one({"status": FAILED})
+    assert failed["attempts"] == 2 and "bad unit" in failed["error"]
+
+
+WORKER = """
+import sys
+from sportblurbs.database import get_database
+from sportblurbs.workqueue import WorkQueue
+
+database = get_database(sys.argv[1], sys.argv[2])
+queue = WorkQueue(database, "job", lease=30)
+units = list()
+queue.work(lambda unit_doc: units.append(unit_doc["unit"]))
+print(" ".join(units))
+"""
+
+
+@pytest.mark.skipif(
+    "SPORTBLURBS_TEST_MONGO_URI" not in os.environ, reason="needs a local mongod (SPORTBLURBS_TEST_MONGO_URI)"
+)
+def test_worker_processes_share_a_job_without_double_processing():
+    from sportblurbs.database import get_database
+
+    connection_string = os.environ["SPORTBLURBS_TEST_MONGO_URI"]
+    database_name = "sportblurbs-workqueue-test"
+    database = get_database(database_name, connection_string)
+    database.drop_collection(BACKFILL_COLLECTION)
+    WorkQueue(database, "job").add([(str(n), str(n)) for n in range(200)], "game")
+
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, database_name, connection_string],
+            cwd=ROOT,
+            env={**os.environ, "PYTHONPATH": ROOT},
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(4)
+    ]
+    units = [unit for worker in workers for unit in worker.communicate()[0].split()]
+    assert sorted(units, key=int) == [str(n) for n in range(200)]
+    assert WorkQueue(database, "job").status()[DONE] == 200
+    database.drop_collection(BACKFILL_COLLECTION)
@@ -1,14 +1,14 @@
 import pytest
+from sportsipy.nfl.boxscore import BoxscorePlayer
 from unittest import mock
 
+from sportblurbs.filter import frame_filter_nba_at_least_one_minute_played
 from sportblurbs.league import League
+from sportblurbs.template import stat_summary
 from sportblurbs.writer import (
     write_nfl_player_news,
     write_player_blurbs_from_boxscore,
-    _nfl_passing_stat_summary,
-    _nfl_receiving_stat_summary,
-    _nfl_rushing_stat_summary,
-    _stat_summary,
+    write_player_blurbs_from_boxscores,
 )
 
 boxscore_date = "06/15/2008"
@@ -59,7 +59,8 @@ nfl_player_extra_points_made = 2
 
 @pytest.fixture
 def nfl_player_boxscore():
-    bs = mock.Mock()
+    # Specced on sportsipy's player so the templates can only read stats it actually has.
+    bs = mock.Mock(spec=BoxscorePlayer)
     bs.completed_passes = nfl_player_completed_passes
     bs.attempted_passes = nfl_player_attempted_passes
     bs.passing_yards = nfl_player_passing_yards
@@ -69,7 +70,7 @@ def nfl_player_boxscore():
     bs.rush_attempts = nfl_player_rush_attempts
     bs.rush_yards = nfl_player_rush_yards
     bs.rush_touchdowns = nfl_player_rush_touchdowns
-    bs.targets = nfl_player_receptions
+    bs.times_pass_target = nfl_player_targets
     bs.receptions = nfl_player_receptions
     bs.receiving_yards = nfl_player_receiving_yards
     bs.receiving_touchdowns = nfl_player_receiving_touchdowns
@@ -107,97 +108,100 @@ def league():
     ],
 )
 def test_stat_summary_returns_expected_summary(stats, include_zeros, expected_summary):
-    assert _stat_summary(stats, include_zeros) == expected_summary
+    assert stat_summary(stats, include_zeros) == expected_summary
 
 
 @pytest.mark.parametrize(
-    "stats",
+    "stats, expected",
     [
-        {
-            "completed_passes": 20,
-            "attempted_passes": 35,
-            "passing_yards": 300,
-            "passing_touchdowns": 2,
-            "interceptions": 0,
-            "fumbles_lost": 0,
-            "rush_attempts": 0,
-            "rush_touchdowns": 0,
-            "rush_yards": 0,
-        },
-        {
-            "completed_passes": 15,
-            "attempted_passes": 25,
-            "passing_yards": 150,
-            "passing_touchdowns": 0,
-            "interceptions": 1,
-            "fumbles_lost": 1,
-            "rush_attempts": 5,
-            "rush_touchdowns": 0,
-            "rush_yards": 10,
-        },
+        (
+            {
+                "completed_passes": 20,
+                "attempted_passes": 35,
+                "passing_yards": 300,
+                "passing_touchdowns": 2,
+                "interceptions": 0,
+                "fumbles_lost": 0,
+                "rush_attempts": 0,
+                "rush_touchdowns": 0,
+                "rush_yards": 0,
+            },
+            "completed 20 of 35 pass attempts for 300 yards and 2 touchdowns in",
+        ),
+        (
+            {
+                "completed_passes": 15,
+                "attempted_passes": 25,
+                "passing_yards": 150,
+                "passing_touchdowns": 0,
+                "interceptions": 2,
+                "fumbles_lost": 1,
+                "rush_attempts": 5,
+                "rush_touchdowns": 0,
+                "rush_yards": 10,
+            },
+            "completed 15 of 25 pass attempts for 150 yards and 2 interceptions while rushing 5 times for 10 yards and "
+            "a fumble in",
+        ),
     ],
 )
-def test_write_nfl_player_news_for_qbs(boxscore, player, nfl_player_boxscore, stats):
+def test_write_nfl_player_news_for_qbs(boxscore, player, nfl_player_boxscore, stats, expected):
     player.position = "QB"
     nfl_player_boxscore.configure_mock(**stats)
     news = write_nfl_player_news(boxscore, player, nfl_player_boxscore)
-    assert (
-        f"{player_name} completed {nfl_player_boxscore.completed_passes} of {nfl_player_boxscore.attempted_passes}"
-        in news
-    )
-    assert _nfl_passing_stat_summary(nfl_player_boxscore) in news
-    if nfl_player_boxscore.rush_attempts > 0:
-        assert f"while rushing {nfl_player_boxscore.rush_attempts} times" in news
-        assert _nfl_rushing_stat_summary(nfl_player_boxscore) in news
-    else:
-        assert f"rush" not in news
+    assert news.startswith(f"{player_name} {expected} ")
 
 
 @pytest.mark.parametrize(
-    "stats",
+    "stats, expected",
     [
-        {
-            "fumbles_lost": 0,
-            "rush_attempts": 15,
-            "rush_touchdowns": 1,
-            "rush_yards": 95,
-        },
-        {
-            "fumbles_lost": 1,
-            "rush_attempts": 12,
-            "rush_touchdowns": 0,
-            "rush_yards": 55,
-            "targets": 3,
-            "receptions": 2,
-            "receiving_yards": 25,
-            "receiving_touchdowns": 0,
-        },
+        (
+            {
+                "fumbles_lost": 0,
+                "rush_attempts": 15,
+                "rush_touchdowns": 1,
+                "rush_yards": 95,
+                "receptions": 0,
+            },
+            "rushed 15 times for 95 yards and a touchdown in",
+        ),
+        (
+            {
+                "fumbles_lost": 1,
+                "rush_attempts": 12,
+                "rush_touchdowns": 0,
+                "rush_yards": 55,
+                "times_pass_target": 3,
+                "receptions": 2,
+                "receiving_yards": 25,
+                "receiving_touchdowns": 0,
+            },
+            "rushed 12 times for 55 yards and a fumble while catching 2 of 3 targets for 25 yards and a fumble in",
+        ),
     ],
 )
-def test_write_nfl_player_news_for_rbs(boxscore, player, nfl_player_boxscore, stats):
+def test_write_nfl_player_news_for_rbs(boxscore, player, nfl_player_boxscore, stats, expected):
     player.position = "RB"
     nfl_player_boxscore.configure_mock(**stats)
     news = write_nfl_player_news(boxscore, player, nfl_player_boxscore)
-    assert f"{player_name} rushed {nfl_player_boxscore.rush_attempts} times" in news
-    assert _nfl_rushing_stat_summary(nfl_player_boxscore) in news
-    if nfl_player_boxscore.receptions > 0:
-        assert f"while catching {nfl_player_boxscore.receptions} of {nfl_player_boxscore.targets} targets" in news
-        assert _nfl_receiving_stat_summary(nfl_player_boxscore) in news
-    else:
-        assert f"catching" not in news
+    assert news.startswith(f"{player_name} {expected} ")
 
 
-@pytest.mark.parametrize(
-    "stats",
-    [
+RECEIVER_STATS = [
+    (
         {
-            "targets": 10,
+            "times_pass_target": 10,
             "receptions": 8,
             "receiving_yards": 150,
             "receiving_touchdowns": 2,
+            "fumbles_lost": 0,
+            "rush_attempts": 0,
         },
+        "caught 8 of 10 targets for 150 yards and 2 touchdowns in",
+    ),
+    (
         {
-            "targets": 5,
+            "times_pass_target": 5,
             "receptions": 3,
             "receiving_yards": 31,
             "receiving_touchdowns": 0,
@@ -206,53 +210,18 @@ def test_write_nfl_player_news_for_rbs(boxscore, player, nfl_player_boxscore, st
             "rush_touchdowns": 0,
             "rush_yards": 10,
         },
-    ],
-)
-def test_write_nfl_player_news_for_wrs(boxscore, player, nfl_player_boxscore, stats):
-    player.position = "WR"
-    nfl_player_boxscore.configure_mock(**stats)
-    news = write_nfl_player_news(boxscore, player, nfl_player_boxscore)
-    assert f"{player_name} caught {nfl_player_boxscore.receptions} of {nfl_player_boxscore.targets} target" in news
-    assert _nfl_receiving_stat_summary(nfl_player_boxscore) in news
-    if nfl_player_boxscore.rush_attempts > 0:
-        assert f"while rushing {nfl_player_boxscore.rush_attempts} times" in news
-        assert _nfl_rushing_stat_summary(nfl_player_boxscore) in news
-    else:
-        assert f"rush" not in news
+        "caught 3 of 5 targets for 31 yards and a fumble while rushing 2 times for 10 yards and a fumble in",
+    ),
+]
 
 
-@pytest.mark.parametrize(
-    "stats",
-    [
-        {
-            "targets": 10,
-            "receptions": 8,
-            "receiving_yards": 150,
-            "receiving_touchdowns": 2,
-        },
-        {
-            "targets": 5,
-            "receptions": 3,
-            "receiving_yards": 31,
-            "receiving_touchdowns": 0,
-            "fumbles_lost": 1,
-            "rush_attempts": 2,
-            "rush_touchdowns": 0,
-            "rush_yards": 10,
-        },
-    ],
-)
-def test_write_nfl_player_news_for_tes(boxscore, player, nfl_player_boxscore, stats):
-    player.position = "TE"
+@pytest.mark.parametrize("position", ["WR", "TE"])
+@pytest.mark.parametrize("stats, expected", RECEIVER_STATS)
+def test_write_nfl_player_news_for_receivers(boxscore, player, nfl_player_boxscore, position, stats, expected):
+    player.position = position
     nfl_player_boxscore.configure_mock(**stats)
     news = write_nfl_player_news(boxscore, player, nfl_player_boxscore)
-    assert f"{player_name} caught {nfl_player_boxscore.receptions} of {nfl_player_boxscore.targets} target" in news
-    assert _nfl_receiving_stat_summary(nfl_player_boxscore) in news
-    if nfl_player_boxscore.rush_attempts > 0:
-        assert f"while rushing {nfl_player_boxscore.rush_attempts} times" in news
-        assert _nfl_rushing_stat_summary(nfl_player_boxscore) in news
-    else:
-        assert f"rush" not in news
+    assert news.startswith(f"{player_name} {expected} ")
 
 
 @pytest.mark.parametrize(
@@ -291,3 +260,43 @@ def test_write_nfl_player_news_for_ks(boxscore, player, nfl_player_boxscore, sta
         )
     else:
         assert "PATs" not in news
+
+
+def _player_boxscores(player_ids):
+    player_boxscores = list()
+    for pid in player_ids:
+        player_boxscore = mock.Mock()
+        player_boxscore.player_id = pid
+        player_boxscores.append(player_boxscore)
+    return player_boxscores
+
+
+def test_write_player_blurbs_from_boxscores_resolves_each_player_once(league):
+    boxscores = list()
+    for _ in range(3):
+        bs = mock.Mock(home_points=3, away_points=1)
+        bs.home_players = _player_boxscores(["a", "b"])
+        bs.away_players = _player_boxscores(["c"])
+        boxscores.append(bs)
+    league.get_players = mock.Mock(side_effect=lambda ids: {pid: mock.Mock() for pid in ids})
+    news_func = mock.Mock(return_value="news")
+    blurbs = write_player_blurbs_from_boxscores(boxscores, league, news_func)
+    league.get_players.assert_called_once()
+    assert len(blurbs) == 9
+    assert news_func.call_count == 9
+
+
+def test_write_player_blurbs_from_boxscores_only_fetches_players_passing_frame_filters(league):
+    bs = mock.Mock(home_points=3, away_points=1)
+    bs.home_players = _player_boxscores(["a", "b"])
+    bs.away_players = _player_boxscores(["c"])
+    for player_boxscore, minutes_played in zip(bs.home_players + bs.away_players, [32.5, 0, 4.0]):
+        player_boxscore.minutes_played = minutes_played
+    league.get_players = mock.Mock(side_effect=lambda ids: {pid: mock.Mock() for pid in ids})
+    row_filter = mock.Mock(return_value=True)
+    blurbs = write_player_blurbs_from_boxscores(
+        [bs], league, mock.Mock(return_value="news"), filters=[frame_filter_nba_at_least_one_minute_played, row_filter]
+    )
+    league.get_players.assert_called_once_with(["a", "c"])
+    assert row_filter.call_count == 2
+    assert len(blurbs) == 2